@@ -0,0 +1,67 @@
+"""Microbenchmark: per-document markdown setup cost with and without the converter pool.
+
+Run from the repository root:
+
+    python benchmarks/markdown_pool_benchmark.py [--repeat N] [files...]
+
+Without files it renders every course document under courses/.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown
+from src.services.render_service import RenderService
+from src.utils.markdown_pool import MarkdownPool
+
+def timed(func, repeat: int) -> float:
+    """Best average seconds per call over a few rounds"""
+    best = None
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = (time.perf_counter() - started) / repeat
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    files = args.files or sorted(glob.glob(os.path.join(root, 'courses', '*', 'docs', '*.md')))
+    documents = [open(path, encoding='utf-8').read() for path in files]
+    documents.append('# Short note\n\nA single paragraph.\n')
+    extensions = RenderService.EXTENSIONS
+    pool = MarkdownPool(extensions)
+
+    def construct():
+        markdown.Markdown(extensions=extensions)
+
+    def fresh():
+        for document in documents:
+            md = markdown.Markdown(extensions=extensions)
+            md.convert(document)
+
+    def pooled():
+        for document in documents:
+            pool.convert(document)
+
+    setup = timed(construct, args.repeat)
+    before = timed(fresh, args.repeat) / len(documents)
+    after = timed(pooled, args.repeat) / len(documents)
+    print(f'{len(documents)} documents, {len(extensions)} extensions')
+    print(f'  setup only (Markdown construction): {setup * 1000:8.3f} ms')
+    print(f'  fresh converter per document:       {before * 1000:8.3f} ms/doc')
+    print(f'  pooled converter with reset():      {after * 1000:8.3f} ms/doc')
+    print(f'  saved per document:                 {(before - after) * 1000:8.3f} ms ({(1 - after / before) * 100:.0f}%)')
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
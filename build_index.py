@@ -0,0 +1,21 @@
+import argparse
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.services.build_service import BuildService
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the search index from every course document')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: one per CPU core)')
+    args = parser.parse_args()
+
+    stats = BuildService.build_all(args.workers)
+    print(f"Indexed {stats['documents']} documents from {stats['courses']} courses "
+          f"({stats['terms']} terms) with {stats['workers']} workers in {stats['seconds']:.2f}s")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -13,11 +13,18 @@ def create_app():
     # Initialize configuration
     Config.init_app(app)
     
-    # Initialize cache with simple in-memory caching
-    app.config['CACHE_TYPE'] = 'SimpleCache'
+    # Initialize cache, shared between worker processes unless configured otherwise
+    app.config['CACHE_TYPE'] = Config.CACHE_TYPE
+    app.config['CACHE_DIR'] = str(Config.DATA_FOLDER / Config.CACHE_DIRNAME)
+    app.config['CACHE_MAX_BYTES'] = Config.CACHE_MAX_BYTES
+    app.config['CACHE_MAX_ENTRY_BYTES'] = Config.CACHE_MAX_ENTRY_BYTES
     app.config['CACHE_DEFAULT_TIMEOUT'] = 300  # 5 minutes
     cache.init_app(app)
     
+    # Write the user state cookie once per request
+    from .services.user_state_service import UserStateService
+    UserStateService.init_app(app)
+    
     # Register template filters
     from .utils.template_filters import register_filters
     register_filters(app)
@@ -31,4 +38,13 @@ def create_app():
     app.register_blueprint(admin_bp)
     app.register_blueprint(api_bp)
     
+    # Render documents in the background so readers rarely hit a cold cache
+    from .services.warm_service import WarmService
+    WarmService.start(app, warm_all=Config.WARM_ON_STARTUP)
+    
+    # Keep caches fresh when course files change outside the admin panel
+    if Config.WATCH_COURSES:
+        from .services.watch_service import WatchService
+        WatchService.start(app)
+    
     return app
\ No newline at end of file
@@ -27,8 +27,52 @@ class Config:
     ADMIN_USERNAME = 'admin'
     ADMIN_PASSWORD = 'password'
     
+    # Search settings
+    SEARCH_RESULTS_PER_PAGE = 10
+    SEARCH_MAX_RESULTS_PER_PAGE = 50
+    SEARCH_PATTERN_MAX_LENGTH = 200
+    SEARCH_PATTERN_STEP_BUDGET = 2000000  # NFA steps allowed per /pattern/ query
+    SEARCH_PATTERN_MAX_TERMS = 50  # Terms a literal may match before it is too common to narrow /pattern/ candidates
+    SEARCH_INDEX_FILENAME = 'search_index.bin'  # Memory-mapped index under DATA_FOLDER
+    SEARCH_INDEX_FLUSH_DELAY = 5  # Seconds to batch edits before rewriting the index file
+    SEARCH_INDEX_RELOAD_INTERVAL = 2  # Seconds between checks for an index written by another worker
+    
+    # Rendering settings
+    RENDER_CACHE_DIRNAME = 'render_cache'  # Rendered HTML cache under DATA_FOLDER
+    MARKDOWN_POOL_SIZE = 8  # Idle converters kept per extension profile
+    HIGHLIGHT_CACHE_MAX_BLOCKS = 2000  # Highlighted code blocks kept in memory
+    
+    # Content cache settings
+    CACHE_TYPE = 'src.utils.shared_cache.SharedFileCache'  # Shared by all workers; with 'SimpleCache' (per process) every worker watches the courses
+    CACHE_DIRNAME = 'cache'  # Shared cache entries under DATA_FOLDER
+    CACHE_MAX_BYTES = 256 * 1024 * 1024  # Least recently used entries are evicted beyond this
+    CACHE_MAX_ENTRY_BYTES = 8 * 1024 * 1024  # Larger values are not cached
+    RENDERED_DOCUMENT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Rendered documents kept in each worker's memory
+    WARM_ON_STARTUP = True  # Render every document in the background after startup
+    WARM_WORKERS = 2  # Background threads re-rendering documents after startup and edits
+    WARM_LOCK_FILENAME = 'warm.lock'  # Lock under DATA_FOLDER electing the one worker that warms every document
+    CACHE_TIMEOUT = 6 * 60 * 60  # Seconds; the watcher refreshes entries whose files change
+    CACHE_STALE_TTL = 10 * 60  # Seconds an expired entry is still served while it is refreshed
+    CACHE_REFRESH_WORKERS = 2  # Background threads refreshing expired entries
+    WATCH_COURSES = True  # Watch the courses folder for edits made outside the admin panel
+    WATCH_POLL_INTERVAL = 2  # Seconds between scans when inotify is unavailable
+    WATCH_DEBOUNCE = 0.5  # Seconds to let a burst of file events settle
+    WATCH_LOCK_FILENAME = 'watch.lock'  # Lock under DATA_FOLDER electing the one worker that watches a shared cache
+    CATALOG_MANIFEST_FILENAME = 'catalog.json'  # Course catalog manifest under DATA_FOLDER
+    CATALOG_CHECK_INTERVAL = 5  # Seconds between checks of the catalog against folder mtimes
+    
+    # Like settings
+    LIKES_BACKEND = 'journal'  # 'journal' (in memory, journaled next to likes.json) or 'sqlite'
+    LIKES_DB_FILENAME = 'likes.db'  # SQLite database under DATA_FOLDER for the 'sqlite' backend
+    LIKES_FSYNC_INTERVAL = 1  # Seconds between fsyncs of the likes journal
+    LIKES_SYNC_INTERVAL = 0  # Seconds between checks for likes from other workers; 0 checks (one fstat) on every read
+    LIKES_COMPACT_INTERVAL = 5 * 60  # Seconds between folding the journal into likes.json
+    LIKES_COMPACT_BYTES = 1024 * 1024  # Journal size that triggers an early compaction
+    
     # Cookie settings
     COOKIE_MAX_AGE = 30 * 24 * 60 * 60  # 30 days
+    USER_STATE_COOKIE = 'academic_state'  # Signed cookie holding progress and liked courses
+    DOC_ORDINALS_FILENAME = 'doc_ordinals.json'  # Stable course/document ordinals under DATA_FOLDER
     
     @classmethod
     def init_app(cls, app):
@@ -2,9 +2,11 @@ from flask import Blueprint, render_template, request, abort, redirect, url_for,
 from ..services.course_service import CourseService
 from ..services.file_service import FileStorageService
 from ..services.auth_service import AuthService
+from ..services.render_service import RenderService
+from ..services.cache_service import CacheService
+from ..services.warm_service import WarmService
 from ..utils.helpers import sanitize_path
-from .. import cache
-import markdown
+from ..utils.highlight_cache import CachedCodeHilite
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -51,6 +53,18 @@ def admin_dashboard():
         total_documents=total_documents
     )
 
+@admin_bp.route('/cache-stats')
+def admin_cache_stats():
+    """Report the memory footprint of in-process caches"""
+    if not AuthService.is_logged_in():
+        return jsonify({'success': False, 'error': 'Authentication required'}), 401
+    
+    return jsonify({
+        'success': True,
+        'rendered_documents': CourseService.rendered_documents.stats(),
+        'highlighted_blocks': CachedCodeHilite.cache.stats()
+    })
+
 @admin_bp.route('/courses')
 def admin_courses():
     """Admin courses list"""
@@ -113,8 +127,8 @@ def admin_course_new():
                 }
                 
                 if CourseService.save_course_info(course_id, course_data):
-                    # Clear cache after creating a new course
-                    cache.clear()
+                    # Refresh cached entries that show this course
+                    CacheService.invalidate_course(course_id)
                     flash(f'Course "{title}" created successfully', 'success')
                     return redirect(url_for('admin.admin_course_view', course_id=course_id))
                 else:
@@ -160,8 +174,8 @@ def admin_course_edit(course_id):
             }
             
             if CourseService.save_course_info(course_id, course_data):
-                # Clear cache after updating a course
-                cache.clear()
+                # Refresh cached entries that show this course
+                CacheService.invalidate_course(course_id)
                 flash(f'Course "{title}" updated successfully', 'success')
                 return redirect(url_for('admin.admin_course_view', course_id=course_id))
             else:
@@ -211,8 +225,9 @@ def admin_document_new(course_id):
             else:
                 # Save document
                 if CourseService.save_document(course_id, filename, content):
-                    # Clear cache after creating a new document
-                    cache.clear()
+                    # Refresh cached entries that depend on this document and the course listing
+                    CacheService.invalidate_document(course_id, filename)
+                    WarmService.warm_document(course_id, filename)
                     if is_autosave:
                         return jsonify({'success': True}), 200
                     else:
@@ -283,8 +298,9 @@ def admin_document_edit(course_id, filename):
         else:
             # Update document
             if CourseService.save_document(course_id, filename, new_content):
-                # Clear cache after updating a document
-                cache.clear()
+                # Refresh cached entries that depend on this document
+                CacheService.invalidate_document(course_id, filename)
+                WarmService.warm_document(course_id, filename)
                 if is_autosave:
                     return jsonify({'success': True}), 200
                 else:
@@ -314,8 +330,8 @@ def admin_document_delete(course_id, filename):
         abort(404)
     
     if CourseService.delete_document(course_id, filename):
-        # Clear cache after deleting a document
-        cache.clear()
+        # Refresh cached entries that depend on this document and the course listing
+        CacheService.invalidate_document(course_id, filename)
         flash('Document deleted successfully', 'success')
     else:
         flash('Error deleting document', 'error')
@@ -425,18 +441,8 @@ def render_markdown():
     try:
         markdown_content = request.form.get('content', '')
         
-        # Configure markdown with extensions
-        md = markdown.Markdown(extensions=[
-            'tables',
-            'fenced_code',
-            'codehilite',
-            'toc',
-            'nl2br',
-            'sane_lists'
-        ])
-        
         # Convert markdown to HTML
-        html_content = md.convert(markdown_content)
+        html_content, _ = RenderService.render_markdown(markdown_content, 'preview')
         
         # Wrap the content in a div with our preview class for consistent styling
         wrapped_content = f'<div class="markdown-preview-content">{html_content}</div>'
@@ -1,7 +1,8 @@
-from flask import Blueprint, jsonify, request, make_response
+from flask import Blueprint, jsonify, request, make_response, url_for
 from ..services.course_service import CourseService
 from ..services.progress_service import UserProgressService
 from ..services.like_service import LikeService
+from ..services.suggest_service import SuggestService
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -9,11 +10,11 @@ api_bp = Blueprint('api', __name__, url_prefix='/api')
 def api_user_progress():
     """API endpoint to get user's progress for all courses"""
     courses = CourseService.get_all_courses()
+    completed_counts = UserProgressService.get_completed_counts()
     progress_data = {}
     
     for course in courses:
-        user_progress = UserProgressService.get_user_progress(course.id)
-        completed_docs = len(user_progress)
+        completed_docs = completed_counts.get(course.id, 0)
         # Ensure percentage doesn't exceed 100
         percentage = 0
         if course.docs_count > 0:
@@ -88,4 +89,46 @@ def get_course_likes(course_id):
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+@api_bp.route('/likes')
+def get_likes():
+    """API endpoint to get likes for several courses (?ids=a,b,c), or for all courses"""
+    try:
+        ids = request.args.get('ids')
+        if ids is None:
+            likes = LikeService.get_all_likes()
+        else:
+            likes = LikeService.get_likes([course_id for course_id in ids.split(',') if course_id])
+        return jsonify({
+            'success': True,
+            'likes': likes
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api_bp.route('/search/suggest')
+def search_suggest():
+    """API endpoint for search-as-you-type suggestions"""
+    prefix = request.args.get('prefix', '').strip()
+    limit = min(max(1, request.args.get('limit', 8, type=int)), 20)
+    
+    suggestions = SuggestService.suggest(prefix, limit) if prefix else []
+    for suggestion in suggestions:
+        if suggestion['type'] == 'course':
+            suggestion['url'] = url_for('main.course', course_id=suggestion['course_id'])
+        else:
+            suggestion['url'] = url_for(
+                'main.course_document',
+                course_id=suggestion['course_id'],
+                filename=suggestion['filename'],
+                _anchor=suggestion['anchor'] or None
+            )
+    
+    return jsonify({
+        'success': True,
+        'suggestions': suggestions
+    })
\ No newline at end of file
@@ -1,24 +1,37 @@
+import os
 from flask import Blueprint, render_template, request, abort, make_response, jsonify
 from ..services.course_service import CourseService
+from ..services.snapshot_service import SnapshotService
 from ..services.progress_service import UserProgressService
 from ..services.search_service import SearchService
 from ..services.like_service import LikeService
+from ..services.render_service import RenderService
+from ..services.cache_service import CacheService
 from ..utils.helpers import sanitize_path
+from ..utils.conditional import page_etag, not_modified, add_validators
+from ..config.settings import Config
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
 def index():
     """Home page - list all courses"""
-    courses = CourseService.get_all_courses()
-    # Add like counts to each course
-    for course in courses:
-        course.like_count = LikeService.get_course_likes(course.id)
+    courses = SnapshotService.current().courses
+    # Get like counts for each course (snapshot courses are shared and must not be modified);
+    # they are rendered into the page, so like-system.js has nothing left to fetch
+    like_counts = LikeService.get_likes([course.id for course in courses])
+    
+    etag = page_etag('index', courses, like_counts)
+    response = not_modified(etag)
+    if response:
+        return response
     
     # Get user's liked courses
     user_liked_courses = LikeService.get_user_liked_courses()
     
-    return render_template('index.html', courses=courses, user_liked_courses=user_liked_courses)
+    return add_validators(make_response(render_template(
+        'index.html', courses=courses, like_counts=like_counts, user_liked_courses=user_liked_courses
+    )), etag)
 
 @main_bp.route('/course/<course_id>')
 def course(course_id):
@@ -28,11 +41,12 @@ def course(course_id):
         abort(404)
     
     # Check if course exists
-    course = CourseService._load_course_info(course_id)
+    snapshot = SnapshotService.current()
+    course = snapshot.get_course(course_id)
     if not course:
         abort(404)
     
-    docs = CourseService.get_course_documents(course_id)
+    docs = snapshot.get_documents(course_id)
     
     # Get user progress for this course
     user_progress = UserProgressService.get_user_progress(course_id)
@@ -45,11 +59,17 @@ def course(course_id):
     user_liked_courses = LikeService.get_user_liked_courses()
     is_liked = user_liked_courses.get(course_id, False)
     
+    # Only this course's progress and like shape the page, so other cookies leave the ETag alone
+    etag = page_etag('course', course, docs, likes, is_liked, sorted(user_progress))
+    response = not_modified(etag, vary_cookie=True)
+    if response:
+        return response
+    
     # Helper function for templates
     def min_value(a, b):
         return min(a, b)
     
-    return render_template(
+    return add_validators(make_response(render_template(
         'course.html', 
         course=course, 
         docs=docs, 
@@ -58,7 +78,7 @@ def course(course_id):
         likes=likes,
         is_liked=is_liked,
         min=min_value
-    )
+    )), etag, vary_cookie=True)
 
 @main_bp.route('/course/<course_id>/document/<filename>')
 def course_document(course_id, filename):
@@ -67,25 +87,43 @@ def course_document(course_id, filename):
     if not sanitize_path(course_id) or not sanitize_path(filename):
         abort(404)
     
-    doc_data, error = CourseService.read_course_document(course_id, filename)
-    if error:
+    snapshot = SnapshotService.current()
+    course = snapshot.get_course(course_id)
+    if not course or not snapshot.has_document(course_id, filename):
         abort(404)
     
-    docs = CourseService.get_course_documents(course_id)
-    
-    # Get course info for breadcrumb
-    course = CourseService._load_course_info(course_id)
-    
-    # Update user progress
-    response = make_response(render_template(
-        'document.html', 
-        course=course, 
-        doc=doc_data, 
-        docs=docs, 
-        filename=filename
-    ))
+    docs = snapshot.get_documents(course_id)
+    try:
+        stat = os.stat(Config.COURSES_FOLDER / course_id / 'docs' / filename)
+    except FileNotFoundError:
+        abort(404)
     
-    # Set cookie to track progress
+    # The page is the same for every reader: its ETag covers the source file as it is now,
+    # the renderer configuration and the titles shown in the sidebar and navigation
+    etag = page_etag('document', course, stat.st_mtime_ns, stat.st_size, RenderService.config_digest(),
+                     [(doc.filename, doc.title) for doc in docs])
+    response = not_modified(etag)
+    if not response:
+        doc_data, error = CourseService.read_course_document(course_id, filename)
+        if doc_data and (doc_data.mtime_ns, doc_data.size) != (stat.st_mtime_ns, stat.st_size):
+            # Edited outside the admin panel and not yet seen by the watcher
+            CacheService.invalidate(CacheService.document_tag(course_id, filename))
+            doc_data, error = CourseService.read_course_document(course_id, filename)
+        if error:
+            abort(404)
+        
+        prev_doc, next_doc = snapshot.neighbours(course_id, filename)
+        response = add_validators(make_response(render_template(
+            'document.html', 
+            course=course, 
+            doc=doc_data, 
+            docs=docs, 
+            filename=filename,
+            prev_doc=prev_doc,
+            next_doc=next_doc
+        )), etag)
+    
+    # Set cookie to track progress, on 304 responses as well
     progress = UserProgressService.add_document_to_progress(course_id, filename)
     response = UserProgressService.create_progress_response(response, course_id, progress)
     
@@ -95,12 +133,30 @@ def course_document(course_id, filename):
 def search():
     """Search page - search documents"""
     query = request.args.get('q', '').strip()
-    results = SearchService.search_documents(query) if query else []
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = request.args.get('per_page', Config.SEARCH_RESULTS_PER_PAGE, type=int)
+    per_page = min(max(1, per_page), Config.SEARCH_MAX_RESULTS_PER_PAGE)
+    
+    results, total, error = SearchService.search_documents(query, page, per_page) if query else ([], 0, None)
+    
+    # Fall back to the closest known spelling when nothing matches
+    corrected_query = None
+    if query and not total and not error:
+        corrected_query = SearchService.suggest_correction(query)
+        if corrected_query:
+            results, total, error = SearchService.search_documents(corrected_query, page, per_page)
+    total_pages = (total + per_page - 1) // per_page
     courses = CourseService.get_all_courses()
     
     return render_template(
         'search.html', 
         courses=courses, 
         results=results, 
-        query=query
+        query=query,
+        corrected_query=corrected_query,
+        error=error,
+        total=total,
+        page=page,
+        per_page=per_page,
+        total_pages=total_pages
     )
\ No newline at end of file
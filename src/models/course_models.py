@@ -1,7 +1,7 @@
 import json
 import os
 from dataclasses import dataclass, asdict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Mapping, Tuple
 from pathlib import Path
 
 @dataclass
@@ -26,7 +26,71 @@ class Document:
     title: str
     content: Optional[str] = None
     toc: Optional[str] = None
+    size: int = 0
+    mtime_ns: int = 0
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert document to dictionary"""
-        return asdict(self)
\ No newline at end of file
+        return asdict(self)
+
+@dataclass
+class CatalogCourse:
+    """Catalog entry for one course folder, with the stats that validate it"""
+    course: Course
+    documents: List[Document]
+    dir_mtime_ns: int
+    docs_mtime_ns: int  # 0 when the course has no docs folder
+    info_stat: Tuple[int, int]  # (mtime_ns, size) of course.json, (0, 0) when missing
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert catalog entry to a manifest record"""
+        return {
+            'course': self.course.to_dict(),
+            'documents': [[doc.filename, doc.title, doc.size, doc.mtime_ns] for doc in self.documents],
+            'dir_mtime_ns': self.dir_mtime_ns,
+            'docs_mtime_ns': self.docs_mtime_ns,
+            'info_stat': list(self.info_stat)
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CatalogCourse':
+        """Create catalog entry from a manifest record"""
+        return cls(
+            course=Course(**data['course']),
+            documents=[
+                Document(filename=filename, title=title, size=size, mtime_ns=mtime_ns)
+                for filename, title, size, mtime_ns in data['documents']
+            ],
+            dir_mtime_ns=data['dir_mtime_ns'],
+            docs_mtime_ns=data['docs_mtime_ns'],
+            info_stat=tuple(data['info_stat'])
+        )
+
+@dataclass(frozen=True)
+class ContentSnapshot:
+    """Immutable view of the catalog, document lists and navigation order.
+    
+    A snapshot is never modified; changes build a new one that replaces
+    it as a whole. The courses and documents it holds are shared between
+    requests and must not be mutated either.
+    """
+    courses: Tuple[Course, ...]
+    courses_by_id: Mapping[str, Course]
+    documents: Mapping[str, Tuple[Document, ...]]
+    navigation: Mapping[Tuple[str, str], Tuple[Optional[Document], Optional[Document]]]
+    
+    def get_course(self, course_id: str) -> Optional[Course]:
+        """Get a course by id"""
+        return self.courses_by_id.get(course_id)
+    
+    def get_documents(self, course_id: str) -> Tuple[Document, ...]:
+        """Get a course's documents in navigation order"""
+        return self.documents.get(course_id, ())
+    
+    def has_document(self, course_id: str, filename: str) -> bool:
+        """Check whether a course has a document"""
+        return (course_id, filename) in self.navigation
+    
+    def neighbours(self, course_id: str, filename: str) -> Tuple[Optional[Document], Optional[Document]]:
+        """Get the previous and next documents of a document"""
+        return self.navigation.get((course_id, filename), (None, None))
\ No newline at end of file
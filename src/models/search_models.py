@@ -0,0 +1,45 @@
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+@dataclass
+class IndexedSection:
+    """Heading-delimited section of an indexed document"""
+    token_start: int
+    offset: int
+    anchor: str
+    heading: str
+
+@dataclass
+class IndexedDocument:
+    """Document entry stored in the search index"""
+    doc_id: int
+    course_id: str
+    filename: str
+    title: str
+    length: int = 0
+    terms: List[str] = field(default_factory=list)
+    title_terms: Set[str] = field(default_factory=set)
+    heading_terms: Set[str] = field(default_factory=set)
+    sections: List[IndexedSection] = field(default_factory=list)
+    offsets: array = field(default_factory=lambda: array('I'))
+    mtime_ns: int = 0
+    size: int = 0
+    
+    def section_at_offset(self, offset: int) -> IndexedSection:
+        """Get the section containing a character offset"""
+        index = bisect_right([section.offset for section in self.sections], offset) - 1
+        return self.sections[max(index, 0)]
+
+@dataclass
+class ParsedQuery:
+    """Search query split into literal terms, phrases or an explicit pattern"""
+    terms: List[str] = field(default_factory=list)
+    phrases: List[List[str]] = field(default_factory=list)
+    pattern: Optional[str] = None
+    
+    @property
+    def all_terms(self) -> List[str]:
+        """Every distinct term the query needs, including phrase terms"""
+        return list(dict.fromkeys(self.terms + [term for phrase in self.phrases for term in phrase]))
@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+# Encoding layout (unsigned integers are LEB128 varints):
+#   version      one byte
+#   liked        byte length, then the liked-courses bitset (little-endian)
+#   progress     course count, then per course: course ordinal, byte length, read-documents bitset
+STATE_VERSION = 1
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError('truncated user state')
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+def _write_bits(out: bytearray, bits: int):
+    encoded = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    _write_varint(out, len(encoded))
+    out.extend(encoded)
+
+def _read_bits(data: bytes, pos: int) -> Tuple[int, int]:
+    length, pos = _read_varint(data, pos)
+    if pos + length > len(data):
+        raise ValueError('truncated user state')
+    return int.from_bytes(data[pos:pos + length], 'little'), pos + length
+
+@dataclass
+class UserState:
+    """A user's liked courses and read documents, as bitsets over stable ordinals"""
+    liked_courses: int = 0
+    progress: Dict[int, int] = field(default_factory=dict)  # course ordinal -> document bitset
+    
+    @staticmethod
+    def members(bits: int) -> List[int]:
+        """Get the ordinals set in a bitset"""
+        members = []
+        while bits:
+            lowest = bits & -bits
+            members.append(lowest.bit_length() - 1)
+            bits ^= lowest
+        return members
+    
+    @staticmethod
+    def count(bits: int) -> int:
+        """Get the number of ordinals set in a bitset"""
+        return bin(bits).count('1')
+    
+    def to_bytes(self) -> bytes:
+        """Encode the state in its compact binary form"""
+        out = bytearray([STATE_VERSION])
+        _write_bits(out, self.liked_courses)
+        courses = [(course, bits) for course, bits in sorted(self.progress.items()) if bits]
+        _write_varint(out, len(courses))
+        for course, bits in courses:
+            _write_varint(out, course)
+            _write_bits(out, bits)
+        return bytes(out)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'UserState':
+        """Decode a state, raising ValueError when it is malformed or of another version"""
+        if not data or data[0] != STATE_VERSION:
+            raise ValueError('unsupported user state version')
+        liked_courses, pos = _read_bits(data, 1)
+        count, pos = _read_varint(data, pos)
+        progress = {}
+        for _ in range(count):
+            course, pos = _read_varint(data, pos)
+            progress[course], pos = _read_bits(data, pos)
+        return cls(liked_courses=liked_courses, progress=progress)
\ No newline at end of file
@@ -0,0 +1,84 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from ..models.search_models import IndexedDocument
+from .index_service import IndexService, InvertedIndex, analyze_document
+from .render_service import RenderService
+from ..config.settings import Config
+
+# (document, term positions) pairs produced by one course
+CourseResult = List[Tuple[IndexedDocument, Dict[str, List[int]]]]
+
+def _process_course(course_id: str, docs_path: str, render_path: str) -> CourseResult:
+    """Read, tokenize and render every document of one course (runs in a worker process)"""
+    results = []
+    for doc_entry in os.scandir(docs_path):
+        if not doc_entry.name.endswith('.md') or not doc_entry.is_file():
+            continue
+        try:
+            with open(doc_entry.path, 'r', encoding='utf-8') as f:
+                stat = os.fstat(f.fileno())
+                content = f.read()
+        except Exception as e:
+            print(f"Error indexing document {doc_entry.path}: {e}")
+            continue
+        results.append(analyze_document(course_id, doc_entry.name, content, stat.st_mtime_ns, stat.st_size))
+        try:
+            RenderService.render_file(Path(doc_entry.path), Path(render_path) / f'{doc_entry.name}.json',
+                                      content, stat)
+        except Exception as e:
+            print(f"Error rendering document {doc_entry.path}: {e}")
+    return results
+
+class BuildService:
+    """Service class for building search data from every document at once"""
+
+    @staticmethod
+    def _course_folders() -> List[Tuple[str, str, str]]:
+        """Get (course id, docs folder, render cache folder) for every course that has documents"""
+        if not Config.COURSES_FOLDER.exists():
+            return []
+        folders = []
+        for course_entry in os.scandir(Config.COURSES_FOLDER):
+            docs_path = os.path.join(course_entry.path, 'docs')
+            if course_entry.is_dir() and os.path.isdir(docs_path):
+                render_path = str(RenderService.course_cache_folder(course_entry.name))
+                folders.append((course_entry.name, docs_path, render_path))
+        return folders
+
+    @staticmethod
+    def build_all(workers: Optional[int] = None) -> Dict:
+        """Build the search index and render cache with one task per course spread over worker processes.
+
+        Workers read, tokenize and render into the on-disk render cache;
+        their index entries are merged here and written as the shared index
+        file, which running servers pick up on their next reload check.
+        """
+        started = time.monotonic()
+        folders = BuildService._course_folders()
+        workers = max(1, min(workers or os.cpu_count() or 1, len(folders) or 1))
+
+        index = InvertedIndex()
+        if workers == 1:
+            for course_results in (_process_course(*folder) for folder in folders):
+                BuildService._merge(index, course_results)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for course_results in executor.map(_process_course, *zip(*folders)):
+                    BuildService._merge(index, course_results)
+
+        IndexService.rebuild(index)
+        return {
+            'courses': len(folders),
+            'documents': len(index),
+            'terms': len(index.postings),
+            'workers': workers,
+            'seconds': time.monotonic() - started
+        }
+
+    @staticmethod
+    def _merge(index: InvertedIndex, course_results: CourseResult):
+        for document, term_positions in course_results:
+            index.add_analyzed(document, term_positions)
\ No newline at end of file
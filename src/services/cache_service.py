@@ -0,0 +1,182 @@
+import functools
+import hashlib
+import inspect
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from flask import current_app
+from flask_caching.backends import NullCache, SimpleCache
+from ..utils.lru_cache import LRUCache
+from ..config.settings import Config
+from .. import cache
+
+class CacheService:
+    """Service class for memoization with tag-based invalidation.
+
+    Every memoized entry depends on a few tags such as a course or a
+    document. Each tag has a version stored in the cache, and the
+    versions are part of the entry's key, so invalidating a tag gives it
+    a new version: entries built against the old one are never looked
+    up again and simply expire.
+
+    An entry that outlives its timeout is still served for up to
+    Config.CACHE_STALE_TTL seconds while a single background refresh,
+    shared by all workers, replaces it.
+    """
+
+    SEARCH = 'search'
+    REFRESH_LOCK_TIMEOUT = 60  # Seconds before a refresh lost with its worker may be retried
+
+    _refresher: Optional[ThreadPoolExecutor] = None
+    _refreshing: Set[str] = set()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_shared() -> bool:
+        """Whether entries and tag versions are seen by every worker process, not just this one"""
+        return not isinstance(cache.cache, (SimpleCache, NullCache))
+
+    @staticmethod
+    def course_tag(course_id: str) -> str:
+        return f'course:{course_id}'
+
+    @staticmethod
+    def document_tag(course_id: str, filename: str) -> str:
+        return f'document:{course_id}/{filename}'
+
+    @staticmethod
+    def index_tag(version: str) -> str:
+        return f'index:{version}'
+
+    @staticmethod
+    def memoize(tags: Callable[..., Iterable[str]], timeout: Optional[int] = None,
+                local: Optional[LRUCache] = None):
+        """Memoize a function, tagging each entry with tags(*args, **kwargs).
+        
+        timeout defaults to Config.CACHE_TIMEOUT. A local LRUCache keeps
+        entries in process memory in front of the shared cache; it uses
+        the same versioned keys, so invalidation applies to it as well.
+        Invalidated entries are never served stale.
+        """
+        def decorator(func):
+            name = f'{func.__module__}.{func.__qualname__}'
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                versions = CacheService._tag_versions(list(tags(*bound.args, **bound.kwargs)))
+                key = CacheService._make_key(name, bound.arguments, versions)
+                entry_timeout = Config.CACHE_TIMEOUT if timeout is None else timeout
+
+                # Entries are (result, fresh until) so that None can be cached too
+                cached = local.get(key) if local is not None else None
+                if cached is None or time.time() >= cached[1]:
+                    # A stale local copy may already have been refreshed by another worker
+                    shared = cache.get(key)
+                    if shared is not None and len(shared) == 2 and (cached is None or shared[1] > cached[1]):
+                        cached = shared
+                        if local is not None:
+                            local.put(key, cached)
+                if cached is not None and len(cached) == 2:
+                    result, fresh_until = cached
+                    now = time.time()
+                    if now < fresh_until:
+                        return result
+                    if now < fresh_until + Config.CACHE_STALE_TTL:
+                        CacheService._schedule_refresh(key, func, bound, entry_timeout, local)
+                        return result
+
+                result = func(*bound.args, **bound.kwargs)
+                CacheService._store(key, result, entry_timeout, local)
+                return result
+
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _store(key: str, result, timeout: int, local: Optional[LRUCache]):
+        """Store a result, keeping it in the shared cache until its stale period ends"""
+        if timeout:
+            entry = (result, time.time() + timeout)
+            cache.set(key, entry, timeout=timeout + Config.CACHE_STALE_TTL)
+        else:
+            entry = (result, float('inf'))
+            cache.set(key, entry, timeout=0)
+        if local is not None:
+            local.put(key, entry)
+
+    @staticmethod
+    def _schedule_refresh(key: str, func: Callable, bound: inspect.BoundArguments, timeout: int,
+                          local: Optional[LRUCache]):
+        """Recompute an expired entry in the background unless a refresh is already running"""
+        with CacheService._lock:
+            if key in CacheService._refreshing:
+                return
+            CacheService._refreshing.add(key)
+            if CacheService._refresher is None:
+                CacheService._refresher = ThreadPoolExecutor(max_workers=Config.CACHE_REFRESH_WORKERS,
+                                                             thread_name_prefix='cache-refresh')
+
+        # Other workers serve their stale copy while one of them refreshes it
+        if not cache.add(f'refresh:{key}', 1, timeout=CacheService.REFRESH_LOCK_TIMEOUT):
+            with CacheService._lock:
+                CacheService._refreshing.discard(key)
+            return
+        CacheService._refresher.submit(CacheService._refresh, current_app._get_current_object(),
+                                       key, func, bound, timeout, local)
+
+    @staticmethod
+    def _refresh(app, key: str, func: Callable, bound: inspect.BoundArguments, timeout: int,
+                 local: Optional[LRUCache]):
+        with app.app_context():
+            try:
+                CacheService._store(key, func(*bound.args, **bound.kwargs), timeout, local)
+            except Exception as e:
+                print(f"Error refreshing cache entry {key}: {e}")
+            finally:
+                cache.delete(f'refresh:{key}')
+        with CacheService._lock:
+            CacheService._refreshing.discard(key)
+
+    @staticmethod
+    def _make_key(name: str, arguments: Dict, versions: List[str]) -> str:
+        digest = hashlib.sha256(repr((sorted(arguments.items()), versions)).encode('utf-8')).hexdigest()
+        return f'memo:{name}:{digest}'
+
+    @staticmethod
+    def _tag_versions(tags: List[str]) -> List[str]:
+        """Get the current version of each tag, starting a new one for unknown tags"""
+        keys = [f'tag:{tag}' for tag in tags]
+        versions = list(cache.get_many(*keys)) if keys else []
+        for i, version in enumerate(versions):
+            if version is None:
+                # A tag that was never set or has been evicted gets a fresh version,
+                # so entries built against a lost version can never be returned
+                cache.add(keys[i], uuid.uuid4().hex, timeout=0)
+                versions[i] = cache.get(keys[i])
+        return versions
+
+    @staticmethod
+    def invalidate(*tags: str):
+        """Invalidate every entry that depends on any of the tags"""
+        for tag in tags:
+            cache.set(f'tag:{tag}', uuid.uuid4().hex, timeout=0)
+
+    @staticmethod
+    def invalidate_course(course_id: str):
+        """Invalidate entries showing a course's details after it was created or edited"""
+        CacheService.invalidate(CacheService.course_tag(course_id), CacheService.SEARCH)
+
+    @staticmethod
+    def invalidate_document(course_id: str, filename: str):
+        """Invalidate entries depending on a document after it was saved or deleted.
+        
+        Document lists and catalog counts come from the catalog snapshot,
+        which follows the files themselves, so adding or removing a
+        document needs no further tags.
+        """
+        CacheService.invalidate(CacheService.document_tag(course_id, filename), CacheService.SEARCH)
\ No newline at end of file
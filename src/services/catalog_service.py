@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from ..models.course_models import Course, Document, CatalogCourse
+from ..utils.helpers import format_title, sanitize_path, atomic_write
+from ..config.settings import Config
+
+MANIFEST_VERSION = 1
+
+class CatalogService:
+    """Service class for the course catalog, built in one pass and persisted as a manifest.
+
+    The manifest records each course folder's metadata and document list
+    along with the mtimes of the folders they were read from. Adding,
+    removing or renaming a document changes its docs folder's mtime, so
+    a few stats per course are enough to tell which courses must be
+    listed again. Document sizes and mtimes are as of the last listing;
+    edits through the admin panel or seen by the watcher refresh them.
+    """
+
+    _catalog: Optional[Dict[str, CatalogCourse]] = None
+    _root_mtime_ns = 0
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _manifest_path():
+        return Config.DATA_FOLDER / Config.CATALOG_MANIFEST_FILENAME
+
+    @staticmethod
+    def get_catalog() -> Dict[str, CatalogCourse]:
+        """Get the catalog of every course folder, revalidating it every few seconds"""
+        catalog = CatalogService._catalog
+        if catalog is None or time.monotonic() - CatalogService._checked_at > Config.CATALOG_CHECK_INTERVAL:
+            with CatalogService._lock:
+                if CatalogService._catalog is None:
+                    CatalogService._load_manifest()
+                CatalogService._validate()
+                catalog = CatalogService._catalog
+        return catalog
+
+    @staticmethod
+    def get_course(course_id: str) -> Optional[CatalogCourse]:
+        """Get the catalog entry of a course"""
+        return CatalogService.get_catalog().get(course_id)
+
+    @staticmethod
+    def refresh_course(course_id: str):
+        """List a course folder again after it was changed"""
+        if not sanitize_path(course_id):
+            return
+        with CatalogService._lock:
+            if CatalogService._catalog is None:
+                CatalogService._load_manifest()
+            catalog = dict(CatalogService._catalog)
+            entry = CatalogService._scan_course(course_id)
+            if entry is None:
+                catalog.pop(course_id, None)
+            else:
+                catalog[course_id] = entry
+            CatalogService._catalog = catalog
+            CatalogService._save_manifest()
+
+    @staticmethod
+    def _load_manifest():
+        """Load the persisted manifest, starting empty when it is missing or unreadable"""
+        CatalogService._catalog = {}
+        CatalogService._root_mtime_ns = 0
+        try:
+            with open(CatalogService._manifest_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                CatalogService._catalog = {
+                    course_id: CatalogCourse.from_dict(entry) for course_id, entry in data['courses'].items()
+                }
+                CatalogService._root_mtime_ns = data['root_mtime_ns']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading catalog manifest: {e}")
+
+    @staticmethod
+    def _save_manifest():
+        path = CatalogService._manifest_path()
+        try:
+            with atomic_write(path) as f:
+                json.dump({
+                    'version': MANIFEST_VERSION,
+                    'root_mtime_ns': CatalogService._root_mtime_ns,
+                    'courses': {course_id: entry.to_dict() for course_id, entry in CatalogService._catalog.items()}
+                }, f, separators=(',', ':'))
+        except Exception as e:
+            print(f"Error saving catalog manifest: {e}")
+
+    @staticmethod
+    def _validate():
+        """Re-list only the course folders whose stats no longer match the catalog"""
+        CatalogService._checked_at = time.monotonic()
+        catalog = CatalogService._catalog
+        root_mtime_ns = CatalogService._stat_mtime(Config.COURSES_FOLDER)
+
+        if root_mtime_ns != CatalogService._root_mtime_ns:
+            # Courses were added, removed or renamed
+            course_ids = set()
+            if root_mtime_ns:
+                course_ids = {entry.name for entry in os.scandir(Config.COURSES_FOLDER) if entry.is_dir()}
+        else:
+            course_ids = set(catalog)
+
+        updated = {}
+        for course_id in course_ids:
+            entry = catalog.get(course_id)
+            if entry is None or not CatalogService._is_current(course_id, entry):
+                entry = CatalogService._scan_course(course_id)
+            if entry is not None:
+                updated[course_id] = entry
+
+        if updated != catalog or root_mtime_ns != CatalogService._root_mtime_ns:
+            CatalogService._catalog = updated
+            CatalogService._root_mtime_ns = root_mtime_ns
+            CatalogService._save_manifest()
+
+    @staticmethod
+    def _stat_mtime(path) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _info_stat(course_path: str):
+        try:
+            stat = os.stat(os.path.join(course_path, 'course.json'))
+            return (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return (0, 0)
+
+    @staticmethod
+    def _is_current(course_id: str, entry: CatalogCourse) -> bool:
+        course_path = os.path.join(Config.COURSES_FOLDER, course_id)
+        return (CatalogService._stat_mtime(course_path) == entry.dir_mtime_ns
+                and CatalogService._stat_mtime(os.path.join(course_path, 'docs')) == entry.docs_mtime_ns
+                and CatalogService._info_stat(course_path) == entry.info_stat)
+
+    @staticmethod
+    def _scan_course(course_id: str) -> Optional[CatalogCourse]:
+        """Read a course folder's metadata and list its documents in one scandir pass"""
+        course_path = os.path.join(Config.COURSES_FOLDER, course_id)
+        dir_mtime_ns = CatalogService._stat_mtime(course_path)
+        if not dir_mtime_ns or not os.path.isdir(course_path):
+            return None
+
+        # Stats are taken before reading, so a concurrent change only makes the entry look stale
+        docs_path = os.path.join(course_path, 'docs')
+        docs_mtime_ns = CatalogService._stat_mtime(docs_path)
+        info_stat = CatalogService._info_stat(course_path)
+
+        course = Course(
+            id=course_id,
+            title=format_title(course_id),
+            description='No description available',
+            instructor='Unknown'
+        )
+        if info_stat != (0, 0):
+            try:
+                with open(os.path.join(course_path, 'course.json'), 'r') as f:
+                    course_data = json.load(f)
+                    # Update course info with loaded data
+                    for key, value in course_data.items():
+                        if hasattr(course, key):
+                            setattr(course, key, value)
+            except:
+                pass
+
+        documents = []
+        if docs_mtime_ns:
+            try:
+                for doc_entry in os.scandir(docs_path):
+                    if doc_entry.name.endswith('.md') and doc_entry.is_file():
+                        stat = doc_entry.stat()
+                        documents.append(Document(
+                            filename=doc_entry.name,
+                            title=format_title(doc_entry.name[:-3]),
+                            size=stat.st_size,
+                            mtime_ns=stat.st_mtime_ns
+                        ))
+            except (FileNotFoundError, NotADirectoryError):
+                docs_mtime_ns = 0
+        documents.sort(key=lambda doc: doc.title)
+        course.docs_count = len(documents)
+
+        return CatalogCourse(
+            course=course,
+            documents=documents,
+            dir_mtime_ns=dir_mtime_ns,
+            docs_mtime_ns=docs_mtime_ns,
+            info_stat=info_stat
+        )
\ No newline at end of file
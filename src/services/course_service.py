@@ -1,53 +1,47 @@
 import os
+import sys
 import json
-import markdown
 from typing import List, Tuple, Optional, Dict
 from pathlib import Path
 from ..models.course_models import Course, Document
-from ..utils.helpers import format_title, extract_title_from_markdown, sanitize_path
+from ..utils.helpers import format_title, sanitize_path
+from ..utils.lru_cache import LRUCache
 from ..config.settings import Config
-from .. import cache
+from .index_service import IndexService
+from .suggest_service import SuggestService
+from .render_service import RenderService
+from .cache_service import CacheService
+from .snapshot_service import SnapshotService
+
+def _rendered_size(entry: tuple) -> int:
+    """Approximate memory held by a cached (document, error) result"""
+    document, error = entry[0]
+    if document is None:
+        return sys.getsizeof(error)
+    return sum(sys.getsizeof(value) for value in (document.filename, document.title, document.content, document.toc))
 
 class CourseService:
     """Service class for course-related operations"""
     
+    # Rendered documents kept in this process, bounded by their size in bytes
+    rendered_documents = LRUCache(max_bytes=Config.RENDERED_DOCUMENT_CACHE_MAX_BYTES, sizeof=_rendered_size)
+    
     @staticmethod
-    @cache.cached(timeout=300, key_prefix='all_courses')
     def get_all_courses() -> List[Course]:
         """Get list of all courses"""
-        courses = []
-        if Config.COURSES_FOLDER.exists():
-            for course_dir in Config.COURSES_FOLDER.iterdir():
-                if course_dir.is_dir():
-                    course = CourseService._load_course_info(course_dir.name)
-                    course.docs_count = CourseService._count_course_documents(course_dir.name)
-                    courses.append(course)
-        
-        return sorted(courses, key=lambda x: x.title)
+        return list(SnapshotService.current().courses)
     
     @staticmethod
-    @cache.memoize(timeout=300)
     def get_course_documents(course_id: str) -> List[Document]:
         """Get list of documents for a specific course"""
         if not sanitize_path(course_id):
             return []
-            
-        docs = []
-        course_docs_path = Config.COURSES_FOLDER / course_id / 'docs'
         
-        if course_docs_path.exists():
-            for file_path in course_docs_path.iterdir():
-                if file_path.suffix == '.md':
-                    title = format_title(file_path.stem)
-                    docs.append(Document(
-                        filename=file_path.name,
-                        title=title
-                    ))
-        
-        return sorted(docs, key=lambda x: x.title)
+        return list(SnapshotService.current().get_documents(course_id))
     
     @staticmethod
-    @cache.memoize(timeout=300)
+    @CacheService.memoize(lambda course_id, filename: [CacheService.document_tag(course_id, filename)],
+                          local=rendered_documents)
     def read_course_document(course_id: str, filename: str) -> Tuple[Optional[Document], Optional[str]]:
         """Read and parse markdown document from a course"""
         if not sanitize_path(course_id) or not sanitize_path(filename):
@@ -58,29 +52,7 @@ class CourseService:
             return None, "Document not found"
         
         try:
-            content = filepath.read_text(encoding='utf-8')
-            
-            all_builtin = [
-                'abbr', 'attr_list', 'def_list', 'fenced_code', 'footnotes', 'md_in_html',
-                'tables', 'admonition', 'codehilite', 'legacy_attrs', 'legacy_em',
-                'meta', 'nl2br', 'sane_lists', 'smarty', 'toc', 'wikilinks'
-            ]
-
-            # Convert markdown to HTML
-            md = markdown.Markdown(extensions=all_builtin)
-            html_content = md.convert(content)
-            
-            # Extract title
-            title = extract_title_from_markdown(content, filename)
-            
-            document = Document(
-                filename=filename,
-                title=title,
-                content=html_content,
-                toc=getattr(md, 'toc', '')
-            )
-            
-            return document, None
+            return RenderService.render_document(course_id, filename), None
         except Exception as e:
             return None, f"Error reading document: {str(e)}"
     
@@ -97,6 +69,8 @@ class CourseService:
         try:
             with open(course_info_path, 'w') as f:
                 json.dump(course_data, f, indent=2)
+            SnapshotService.refresh_course(course_id)
+            SuggestService.update_course(course_id, course_data.get('title') or format_title(course_id))
             return True
         except Exception as e:
             print(f"Error saving course info: {e}")
@@ -114,6 +88,9 @@ class CourseService:
         filepath = course_docs_path / filename
         try:
             filepath.write_text(content, encoding='utf-8')
+            SnapshotService.refresh_course(course_id)
+            IndexService.update_document(course_id, filename, content)
+            SuggestService.update_document(course_id, filename, content)
             return True
         except Exception as e:
             print(f"Error saving document: {e}")
@@ -129,6 +106,10 @@ class CourseService:
         if filepath.exists():
             try:
                 filepath.unlink()
+                SnapshotService.refresh_course(course_id)
+                IndexService.remove_document(course_id, filename)
+                SuggestService.remove_document(course_id, filename)
+                RenderService.invalidate(course_id, filename)
                 return True
             except Exception as e:
                 print(f"Error deleting document: {e}")
@@ -136,46 +117,25 @@ class CourseService:
         return False
     
     @staticmethod
-    @cache.memoize(timeout=300)
     def _load_course_info(course_id: str) -> Course:
         """Load course information from course.json or create default"""
         if not sanitize_path(course_id):
             return Course(id=course_id, title=format_title(course_id))
-            
-        course_info_path = Config.COURSES_FOLDER / course_id / 'course.json'
-        course_info = Course(
+        
+        course = SnapshotService.current().get_course(course_id)
+        if course:
+            return course
+        return Course(
             id=course_id,
             title=format_title(course_id),
             description='No description available',
             instructor='Unknown'
         )
-        
-        if course_info_path.exists():
-            try:
-                with open(course_info_path, 'r') as f:
-                    course_data = json.load(f)
-                    # Update course info with loaded data
-                    for key, value in course_data.items():
-                        if hasattr(course_info, key):
-                            setattr(course_info, key, value)
-            except:
-                pass
-        
-        return course_info
     
     @staticmethod
-    @cache.memoize(timeout=300)
     def _count_course_documents(course_id: str) -> int:
         """Count documents in a course"""
         if not sanitize_path(course_id):
             return 0
-            
-        docs_count = 0
-        course_docs_path = Config.COURSES_FOLDER / course_id / 'docs'
-        
-        if course_docs_path.exists():
-            for file_path in course_docs_path.iterdir():
-                if file_path.suffix == '.md':
-                    docs_count += 1
         
-        return docs_count
\ No newline at end of file
+        return len(SnapshotService.current().get_documents(course_id))
\ No newline at end of file
@@ -0,0 +1,479 @@
+import os
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from bisect import bisect_left
+from ..models.search_models import IndexedDocument, IndexedSection
+from .index_storage import MappedIndex, write_index_file
+from ..utils.trigram import TrigramIndex
+from ..utils.helpers import tokenize, extract_title_from_markdown, split_markdown_sections, sanitize_path, file_lock
+from ..config.settings import Config
+
+def analyze_document(course_id: str, filename: str, content: str, mtime_ns: int = 0,
+                     size: int = 0) -> Tuple[IndexedDocument, Dict[str, List[int]]]:
+    """Tokenize a document into its index entry and term positions.
+    
+    This does all the per-document work of indexing without touching any
+    shared state, so it can run in worker processes.
+    """
+    tokens = tokenize(content)
+    title = extract_title_from_markdown(content, filename)
+    offsets = array('I', (offset for _, offset in tokens))
+    sections = [
+        IndexedSection(bisect_left(offsets, offset), offset, anchor, heading)
+        for offset, anchor, heading in split_markdown_sections(content)
+    ]
+    term_positions: Dict[str, List[int]] = {}
+    for position, (term, _) in enumerate(tokens):
+        term_positions.setdefault(term, []).append(position)
+
+    document = IndexedDocument(
+        doc_id=-1,
+        course_id=course_id,
+        filename=filename,
+        title=title,
+        length=len(tokens),
+        terms=list(term_positions),
+        title_terms={term for term, _ in tokenize(title)},
+        heading_terms={term for section in sections for term, _ in tokenize(section.heading)},
+        sections=sections,
+        offsets=offsets,
+        mtime_ns=mtime_ns,
+        size=size
+    )
+    return document, term_positions
+
+class InvertedIndex:
+    """In-memory inverted index mapping terms to document postings"""
+
+    def __init__(self, first_doc_id: int = 0):
+        self.documents: Dict[int, IndexedDocument] = {}
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+        self._doc_ids: Dict[Tuple[str, str], int] = {}
+        self.trigrams = TrigramIndex()
+        self.total_length = 0
+        self._next_doc_id = first_doc_id
+        self._lock = threading.RLock()
+
+    def add_document(self, course_id: str, filename: str, content: str,
+                     mtime_ns: int = 0, size: int = 0) -> int:
+        """Index a document, replacing any previous version of it"""
+        document, term_positions = analyze_document(course_id, filename, content, mtime_ns, size)
+        return self.add_analyzed(document, term_positions)
+
+    def add_analyzed(self, document: IndexedDocument, term_positions: Dict[str, List[int]]) -> int:
+        """Add a document produced by analyze_document, replacing any previous version"""
+        with self._lock:
+            self.remove_document(document.course_id, document.filename)
+            doc_id = self._next_doc_id
+            self._next_doc_id += 1
+
+            for term, positions in term_positions.items():
+                if term not in self.postings:
+                    self.postings[term] = {}
+                    self.trigrams.add(term)
+                self.postings[term][doc_id] = positions
+
+            document.doc_id = doc_id
+            self.documents[doc_id] = document
+            self._doc_ids[(document.course_id, document.filename)] = doc_id
+            self.total_length += document.length
+            return doc_id
+
+    def remove_document(self, course_id: str, filename: str) -> bool:
+        """Remove a document and all of its postings from the index"""
+        with self._lock:
+            doc_id = self._doc_ids.pop((course_id, filename), None)
+            if doc_id is None:
+                return False
+
+            document = self.documents.pop(doc_id)
+            self.total_length -= document.length
+            for term in document.terms:
+                term_postings = self.postings.get(term)
+                if term_postings is not None:
+                    term_postings.pop(doc_id, None)
+                    if not term_postings:
+                        del self.postings[term]
+                        self.trigrams.remove(term)
+            return True
+
+    def lookup(self, term: str) -> Dict[int, List[int]]:
+        """Get postings (document id -> positions) for a term"""
+        with self._lock:
+            return dict(self.postings.get(term, {}))
+
+    def terms(self) -> List[str]:
+        """Get every term in sorted order"""
+        with self._lock:
+            return sorted(self.postings)
+
+    def similar_terms(self, term: str, limit: int = 5) -> List[Tuple[int, str]]:
+        """Get indexed terms within a few typos of term, closest first"""
+        with self._lock:
+            return self.trigrams.similar(term, limit)
+
+    def terms_containing(self, fragment: str, limit: int) -> List[str]:
+        """Get up to limit + 1 indexed terms containing a fragment of three or more characters"""
+        with self._lock:
+            return self.trigrams.containing(fragment, limit)
+
+    def get_document(self, doc_id: int) -> Optional[IndexedDocument]:
+        """Get an indexed document by id"""
+        return self.documents.get(doc_id)
+
+    def doc_id_for(self, course_id: str, filename: str) -> Optional[int]:
+        """Get the id of a document by its course and filename"""
+        return self._doc_ids.get((course_id, filename))
+
+    def all_documents(self) -> List[IndexedDocument]:
+        """Get every indexed document"""
+        with self._lock:
+            return list(self.documents.values())
+
+    def document_frequency(self, term: str) -> int:
+        """Get the number of documents containing a term"""
+        return len(self.postings.get(term, ()))
+
+    @property
+    def average_length(self) -> float:
+        """Average document length in terms"""
+        return self.total_length / len(self.documents) if self.documents else 0.0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+class LayeredIndex:
+    """Memory-mapped base index with in-memory changes layered on top.
+
+    Edited documents are indexed into a small in-memory delta and their
+    base entries are hidden, until the next flush folds them into a new
+    index file.
+    """
+
+    def __init__(self, base: Optional[MappedIndex] = None):
+        self.base = base
+        self.delta = InvertedIndex(first_doc_id=len(base) if base else 0)
+        self.removed: Set[int] = set()
+        self._removed_length = 0
+        self._lock = threading.RLock()
+
+    def _hide_base_document(self, course_id: str, filename: str):
+        doc_id = self.base.doc_id_for(course_id, filename) if self.base else None
+        if doc_id is not None and doc_id not in self.removed:
+            self.removed.add(doc_id)
+            self._removed_length += self.base.get_document(doc_id).length
+
+    def add_document(self, course_id: str, filename: str, content: str,
+                     mtime_ns: int = 0, size: int = 0) -> int:
+        """Index a document, replacing any previous version of it"""
+        with self._lock:
+            self._hide_base_document(course_id, filename)
+            return self.delta.add_document(course_id, filename, content, mtime_ns, size)
+
+    def remove_document(self, course_id: str, filename: str):
+        """Remove a document from the index"""
+        with self._lock:
+            self._hide_base_document(course_id, filename)
+            self.delta.remove_document(course_id, filename)
+
+    def lookup(self, term: str) -> Dict[int, List[int]]:
+        """Get postings (document id -> positions) for a term"""
+        postings = self.base.lookup(term) if self.base else {}
+        with self._lock:
+            for doc_id in self.removed:
+                postings.pop(doc_id, None)
+            postings.update(self.delta.lookup(term))
+        return postings
+
+    def terms(self) -> List[str]:
+        """Get every term in sorted order"""
+        terms = set(self.base.terms()) if self.base else set()
+        terms.update(self.delta.terms())
+        return sorted(terms)
+
+    def document_frequency(self, term: str) -> int:
+        """Get the number of documents containing a term"""
+        if self.removed:
+            return len(self.lookup(term))
+        base_frequency = self.base.document_frequency(term) if self.base else 0
+        return base_frequency + self.delta.document_frequency(term)
+
+    def similar_terms(self, term: str, limit: int = 5) -> List[Tuple[int, str]]:
+        """Get indexed terms within a few typos of term, closest first"""
+        candidates = dict((candidate, distance) for distance, candidate in reversed(self.delta.similar_terms(term, limit)))
+        if self.base:
+            for distance, candidate in self.base.similar_terms(term, limit * 2):
+                if candidate not in candidates and self.document_frequency(candidate):
+                    candidates[candidate] = distance
+        return sorted((distance, candidate) for candidate, distance in candidates.items())[:limit]
+
+    def terms_containing(self, fragment: str, limit: int) -> List[str]:
+        """Get up to limit + 1 indexed terms containing a fragment of three or more characters"""
+        terms = set(self.delta.terms_containing(fragment, limit))
+        if self.base:
+            terms.update(self.base.terms_containing(fragment, limit))
+        return sorted(terms)[:limit + 1]
+
+    def get_document(self, doc_id: int) -> Optional[IndexedDocument]:
+        """Get an indexed document by id"""
+        if self.base and doc_id < len(self.base):
+            return None if doc_id in self.removed else self.base.get_document(doc_id)
+        return self.delta.get_document(doc_id)
+
+    def find_document(self, course_id: str, filename: str) -> Optional[IndexedDocument]:
+        """Get an indexed document by its course and filename"""
+        with self._lock:
+            doc_id = self.delta.doc_id_for(course_id, filename)
+            if doc_id is None and self.base:
+                doc_id = self.base.doc_id_for(course_id, filename)
+            return self.get_document(doc_id) if doc_id is not None else None
+
+    def document_stats(self) -> Dict[Tuple[str, str], Tuple[int, int]]:
+        """Get the (mtime_ns, size) recorded for each document when it was indexed"""
+        with self._lock:
+            stats = self.base.document_stats() if self.base else {}
+            for doc_id in self.removed:
+                document = self.base.get_document(doc_id)
+                stats.pop((document.course_id, document.filename), None)
+            for document in self.delta.all_documents():
+                stats[(document.course_id, document.filename)] = (document.mtime_ns, document.size)
+            return stats
+
+    def all_documents(self) -> List[IndexedDocument]:
+        """Get every indexed document"""
+        with self._lock:
+            documents = [document for document in self.base.all_documents()
+                         if document.doc_id not in self.removed] if self.base else []
+            return documents + self.delta.all_documents()
+
+    @property
+    def total_length(self) -> int:
+        base_length = self.base.total_length - self._removed_length if self.base else 0
+        return base_length + self.delta.total_length
+
+    @property
+    def average_length(self) -> float:
+        """Average document length in terms"""
+        return self.total_length / len(self) if len(self) else 0.0
+
+    def __len__(self) -> int:
+        base_count = len(self.base) - len(self.removed) if self.base else 0
+        return base_count + len(self.delta)
+
+class IndexService:
+    """Service class maintaining the shared search index.
+
+    The index lives in a binary file under the data folder that every
+    worker memory-maps. Edits are layered in memory and written back to
+    the file shortly afterwards; other workers notice the new file on
+    their next periodic check and remap it.
+    """
+
+    _index: Optional[LayeredIndex] = None
+    _dirty: Dict[Tuple[str, str], int] = {}
+    _generation = 0
+    _last_check = 0.0
+    _flush_timer: Optional[threading.Timer] = None
+    _lock = threading.RLock()
+
+    @staticmethod
+    def _index_path() -> Path:
+        return Config.DATA_FOLDER / Config.SEARCH_INDEX_FILENAME
+
+    @staticmethod
+    @contextmanager
+    def _file_lock():
+        """Serialize index file writers across worker processes"""
+        with file_lock(IndexService._index_path().with_suffix('.lock')):
+            yield
+
+    @staticmethod
+    def get_index() -> LayeredIndex:
+        """Get the search index, mapping or building the index file on first use"""
+        if (IndexService._index is None or
+                time.monotonic() - IndexService._last_check > Config.SEARCH_INDEX_RELOAD_INTERVAL):
+            with IndexService._lock:
+                IndexService._refresh()
+        return IndexService._index
+
+    @staticmethod
+    def file_version() -> str:
+        """Identify the index file this worker searches, which changes whenever a worker flushes edits"""
+        base = IndexService.get_index().base
+        return '%d-%d-%d' % base.signature if base else ''
+
+    @staticmethod
+    def _refresh():
+        """Map the index file if it is new or was replaced by another worker"""
+        IndexService._last_check = time.monotonic()
+        current = IndexService._index
+        path = IndexService._index_path()
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+
+        if current is not None and current.base is not None and stat is not None and \
+                current.base.signature == (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+            return
+
+        base = None
+        if stat is not None:
+            try:
+                base = MappedIndex(path)
+            except (OSError, ValueError) as e:
+                print(f"Error opening search index: {e}")
+        if base is None:
+            if current is None:
+                IndexService._index = LayeredIndex(IndexService.rebuild())
+            return
+
+        if current is None:
+            # Pick up documents edited while no worker was running
+            stale = IndexService._stale_documents(base)
+            for key in stale:
+                IndexService._mark_dirty(key)
+            if stale:
+                IndexService._schedule_flush()
+
+        index = LayeredIndex(base)
+        for key in IndexService._dirty:
+            IndexService._apply_from_disk(index, key)
+        IndexService._index = index
+
+    @staticmethod
+    def rebuild(index: Optional[InvertedIndex] = None) -> MappedIndex:
+        """Write a fresh index file, building the index here unless one is given.
+
+        Without an index, a usable file written by another worker while
+        this one waited for the lock is mapped instead of built again.
+        """
+        path = IndexService._index_path()
+        with IndexService._file_lock():
+            if index is None and path.exists():
+                try:
+                    return MappedIndex(path)
+                except (OSError, ValueError):
+                    # Unreadable or written by an older version
+                    pass
+            write_index_file(path, index if index is not None else IndexService.build_index())
+            return MappedIndex(path)
+
+    @staticmethod
+    def build_index() -> InvertedIndex:
+        """Build a fresh in-memory index from every document in the courses folder"""
+        index = InvertedIndex()
+        for course_id, filename in IndexService._document_files():
+            IndexService._apply_from_disk(index, (course_id, filename))
+        return index
+
+    @staticmethod
+    def _document_files() -> Dict[Tuple[str, str], os.stat_result]:
+        """Stat every markdown document in the courses folder"""
+        files = {}
+        if not Config.COURSES_FOLDER.exists():
+            return files
+
+        for course_entry in os.scandir(Config.COURSES_FOLDER):
+            docs_path = os.path.join(course_entry.path, 'docs')
+            if not course_entry.is_dir() or not os.path.isdir(docs_path):
+                continue
+            for doc_entry in os.scandir(docs_path):
+                if doc_entry.name.endswith('.md') and doc_entry.is_file():
+                    files[(course_entry.name, doc_entry.name)] = doc_entry.stat()
+        return files
+
+    @staticmethod
+    def _stale_documents(base: MappedIndex) -> Set[Tuple[str, str]]:
+        """Find documents whose size or mtime no longer match the index file"""
+        indexed = base.document_stats()
+        on_disk = {key: (stat.st_mtime_ns, stat.st_size) for key, stat in IndexService._document_files().items()}
+        return {key for key in indexed.keys() | on_disk.keys() if indexed.get(key) != on_disk.get(key)}
+
+    @staticmethod
+    def _apply_from_disk(index, key: Tuple[str, str]):
+        """Bring one document in the index in line with the file on disk"""
+        course_id, filename = key
+        file_path = Config.COURSES_FOLDER / course_id / 'docs' / filename
+        try:
+            stat = file_path.stat()
+            content = file_path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            index.remove_document(course_id, filename)
+            return
+        except Exception as e:
+            print(f"Error indexing document {file_path}: {e}")
+            return
+        index.add_document(course_id, filename, content, stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _mark_dirty(key: Tuple[str, str]):
+        IndexService._generation += 1
+        IndexService._dirty[key] = IndexService._generation
+
+    @staticmethod
+    def update_document(course_id: str, filename: str, content: str):
+        """Re-index a document after it has been saved"""
+        if not sanitize_path(course_id) or not sanitize_path(filename):
+            return
+        with IndexService._lock:
+            IndexService._mark_dirty((course_id, filename))
+            # An index that has not been opened yet will pick the change up when it is
+            if IndexService._index is not None:
+                stat = (Config.COURSES_FOLDER / course_id / 'docs' / filename).stat()
+                IndexService._index.add_document(course_id, filename, content, stat.st_mtime_ns, stat.st_size)
+            IndexService._schedule_flush()
+
+    @staticmethod
+    def remove_document(course_id: str, filename: str):
+        """Drop a deleted document from the index"""
+        with IndexService._lock:
+            IndexService._mark_dirty((course_id, filename))
+            if IndexService._index is not None:
+                IndexService._index.remove_document(course_id, filename)
+            IndexService._schedule_flush()
+
+    @staticmethod
+    def _schedule_flush():
+        if IndexService._flush_timer is None:
+            timer = threading.Timer(Config.SEARCH_INDEX_FLUSH_DELAY, IndexService.flush)
+            timer.daemon = True
+            IndexService._flush_timer = timer
+            timer.start()
+
+    @staticmethod
+    def flush():
+        """Fold pending edits into a new index file shared with other workers"""
+        with IndexService._lock:
+            IndexService._flush_timer = None
+            pending = dict(IndexService._dirty)
+        if not pending:
+            return
+
+        try:
+            path = IndexService._index_path()
+            with IndexService._file_lock():
+                # Start from the newest file, which another worker may have written
+                merged = LayeredIndex(MappedIndex(path) if path.exists() else None)
+                for key in pending:
+                    IndexService._apply_from_disk(merged, key)
+                write_index_file(path, merged)
+                base = MappedIndex(path)
+        except Exception as e:
+            print(f"Error writing search index: {e}")
+            return
+
+        with IndexService._lock:
+            # Edits made while the file was being written stay pending
+            for key, generation in pending.items():
+                if IndexService._dirty.get(key) == generation:
+                    del IndexService._dirty[key]
+            index = LayeredIndex(base)
+            for key in IndexService._dirty:
+                IndexService._apply_from_disk(index, key)
+            IndexService._index = index
+            IndexService._last_check = time.monotonic()
@@ -0,0 +1,273 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from ..models.search_models import IndexedDocument, IndexedSection
+from ..utils.helpers import tokenize, atomic_write
+from ..utils.trigram import find_similar, inner_trigrams, trigrams
+
+# File layout (all integers are native-endian unsigned 32-bit unless noted):
+#   header      MAGIC, byte order, then (offset, length) pairs as u64
+#   postings    per term: (doc id, position count, positions...) per document
+#   char_offs   token character offsets of every document, concatenated
+#   terms       UTF-8 bytes of every term in sorted order, concatenated
+#   table       per term: (term byte start, term byte length, postings start, postings length)
+#   meta        JSON list of documents with titles, sections and file stats
+#   grams       UTF-8 bytes of every term trigram in sorted order, concatenated
+#   gram_table  per trigram: (trigram byte start, trigram byte length, gram_terms start, term count)
+#   gram_terms  per trigram: the ordinals in the term table of the terms containing it
+MAGIC = b'ACIDX003'
+HEADER = struct.Struct('<8s8sQQQQQQQQQQQQQQQQ')
+TABLE_ENTRY_WORDS = 4
+
+class MappedIndex:
+    """Read-only search index served straight from a memory-mapped file.
+
+    The term table is binary searched in place and postings are decoded
+    only for the terms a query asks for, so every worker process shares
+    the same page-cache copy of the index. Fuzzy matching likewise
+    searches the trigram table in place, without loading the vocabulary.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, byteorder, postings_off, postings_len, char_off, char_len, terms_off, terms_len,
+         table_off, table_len, meta_off, meta_len, grams_off, grams_len, gram_table_off, gram_table_len,
+         gram_terms_off, gram_terms_len) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or byteorder.rstrip(b'\0').decode() != sys.byteorder:
+            raise ValueError(f'{path} is not a compatible search index file')
+
+        view = memoryview(self._mmap)
+        self._postings = view[postings_off:postings_off + postings_len].cast('I')
+        self._char_offsets = view[char_off:char_off + char_len].cast('I')
+        self._terms = view[terms_off:terms_off + terms_len]
+        self._table = view[table_off:table_off + table_len].cast('I')
+        self._meta = json.loads(bytes(view[meta_off:meta_off + meta_len]).decode('utf-8'))
+        self._grams = view[grams_off:grams_off + grams_len]
+        self._gram_table = view[gram_table_off:gram_table_off + gram_table_len].cast('I')
+        self._gram_terms = view[gram_terms_off:gram_terms_off + gram_terms_len].cast('I')
+
+        self.term_count = len(self._table) // TABLE_ENTRY_WORDS
+        self.total_length = sum(entry[3] for entry in self._meta)
+        self._doc_ids = {(entry[0], entry[1]): doc_id for doc_id, entry in enumerate(self._meta)}
+        self._documents: Dict[int, IndexedDocument] = {}
+
+    def _term_at(self, index: int) -> str:
+        start = self._table[index * TABLE_ENTRY_WORDS]
+        length = self._table[index * TABLE_ENTRY_WORDS + 1]
+        return bytes(self._terms[start:start + length]).decode('utf-8')
+
+    def _find_term(self, term: str) -> int:
+        """Binary search the sorted term table, returning -1 when absent"""
+        return _find_key(self._table, self._terms, term)
+
+    def _terms_with(self, trigram: str) -> memoryview:
+        """Get the term ordinals of the terms containing a trigram"""
+        index = _find_key(self._gram_table, self._grams, trigram)
+        if index < 0:
+            return self._gram_terms[0:0]
+        start = self._gram_table[index * TABLE_ENTRY_WORDS + 2]
+        return self._gram_terms[start:start + self._gram_table[index * TABLE_ENTRY_WORDS + 3]]
+
+    def terms(self) -> Iterable[str]:
+        """Iterate over every term in sorted order"""
+        return (self._term_at(index) for index in range(self.term_count))
+
+    def lookup(self, term: str) -> Dict[int, List[int]]:
+        """Get postings (document id -> positions) for a term"""
+        index = self._find_term(term)
+        if index < 0:
+            return {}
+
+        start = self._table[index * TABLE_ENTRY_WORDS + 2]
+        end = start + self._table[index * TABLE_ENTRY_WORDS + 3]
+        postings = {}
+        while start < end:
+            doc_id, count = self._postings[start], self._postings[start + 1]
+            postings[doc_id] = self._postings[start + 2:start + 2 + count].tolist()
+            start += 2 + count
+        return postings
+
+    def document_frequency(self, term: str) -> int:
+        """Get the number of documents containing a term"""
+        return len(self.lookup(term))
+
+    def doc_id_for(self, course_id: str, filename: str) -> Optional[int]:
+        """Get the id of a document by its course and filename"""
+        return self._doc_ids.get((course_id, filename))
+
+    def document_stats(self) -> Dict[Tuple[str, str], Tuple[int, int]]:
+        """Get the (mtime_ns, size) recorded for each document when it was indexed"""
+        return {(entry[0], entry[1]): (entry[4], entry[5]) for entry in self._meta}
+
+    def get_document(self, doc_id: int) -> Optional[IndexedDocument]:
+        """Get an indexed document by id, decoding its metadata on first use"""
+        document = self._documents.get(doc_id)
+        if document is None and 0 <= doc_id < len(self._meta):
+            course_id, filename, title, length, mtime_ns, size, sections, offsets_start = self._meta[doc_id]
+            sections = [IndexedSection(*section) for section in sections]
+            document = IndexedDocument(
+                doc_id=doc_id,
+                course_id=course_id,
+                filename=filename,
+                title=title,
+                length=length,
+                title_terms={term for term, _ in tokenize(title)},
+                heading_terms={term for section in sections for term, _ in tokenize(section.heading)},
+                sections=sections,
+                offsets=self._char_offsets[offsets_start:offsets_start + length],
+                mtime_ns=mtime_ns,
+                size=size
+            )
+            self._documents[doc_id] = document
+        return document
+
+    def all_documents(self) -> List[IndexedDocument]:
+        """Get every indexed document"""
+        return [self.get_document(doc_id) for doc_id in range(len(self._meta))]
+
+    def similar_terms(self, term: str, limit: int = 5) -> List[Tuple[int, str]]:
+        """Get indexed terms within a few typos of term, closest first"""
+        return find_similar(term, self._terms_with, self._term_at, limit)
+
+    def terms_containing(self, fragment: str, limit: int) -> List[str]:
+        """Get up to limit + 1 indexed terms containing a fragment of three or more characters"""
+        candidates = None
+        for ordinals in sorted((self._terms_with(trigram) for trigram in inner_trigrams(fragment)), key=len):
+            candidates = set(ordinals) if candidates is None else candidates.intersection(ordinals)
+            if not candidates:
+                return []
+        terms = []
+        for ordinal in sorted(candidates or ()):
+            term = self._term_at(ordinal)
+            if fragment in term:
+                terms.append(term)
+                if len(terms) > limit:
+                    break
+        return terms
+
+    @property
+    def average_length(self) -> float:
+        """Average document length in terms"""
+        return self.total_length / len(self._meta) if self._meta else 0.0
+
+    def __len__(self) -> int:
+        return len(self._meta)
+
+def _find_key(table: memoryview, blob: memoryview, key: str) -> int:
+    """Binary search a table of (byte start, byte length, ...) entries over sorted keys in blob"""
+    encoded = key.encode('utf-8')
+    low, high = 0, len(table) // TABLE_ENTRY_WORDS
+    while low < high:
+        middle = (low + high) // 2
+        start = table[middle * TABLE_ENTRY_WORDS]
+        length = table[middle * TABLE_ENTRY_WORDS + 1]
+        candidate = bytes(blob[start:start + length])
+        if candidate < encoded:
+            low = middle + 1
+        elif candidate > encoded:
+            high = middle
+        else:
+            return middle
+    return -1
+
+def write_index_file(path: Path, index) -> None:
+    """Serialize an index to path, replacing any existing file atomically.
+
+    Documents are renumbered densely in (course, filename) order. Any
+    object with terms(), lookup() and all_documents() can be written.
+    """
+    documents = sorted(index.all_documents(), key=lambda doc: (doc.course_id, doc.filename))
+    new_ids = {document.doc_id: new_id for new_id, document in enumerate(documents)}
+
+    with atomic_write(path, 'wb', fsync=True) as f:
+        f.write(b'\0' * HEADER.size)
+
+        # Postings, one term at a time
+        postings_off = f.tell()
+        term_bytes = bytearray()
+        table = array('I')
+        postings_written = 0
+        gram_ordinals: Dict[str, array] = {}
+        for term in index.terms():
+            term_postings = index.lookup(term)
+            packed = array('I')
+            for doc_id in sorted(term_postings, key=lambda old_id: new_ids.get(old_id, -1)):
+                if doc_id not in new_ids:
+                    continue
+                positions = term_postings[doc_id]
+                packed.append(new_ids[doc_id])
+                packed.append(len(positions))
+                packed.extend(positions)
+            if not packed:
+                continue
+            for trigram in trigrams(term):
+                gram_ordinals.setdefault(trigram, array('I')).append(len(table) // TABLE_ENTRY_WORDS)
+            encoded = term.encode('utf-8')
+            table.extend((len(term_bytes), len(encoded), postings_written, len(packed)))
+            term_bytes.extend(encoded)
+            packed.tofile(f)
+            postings_written += len(packed)
+        postings_len = f.tell() - postings_off
+
+        # Token character offsets of every document
+        char_off = f.tell()
+        meta = []
+        offsets_written = 0
+        for document in documents:
+            array('I', document.offsets).tofile(f)
+            meta.append([
+                document.course_id, document.filename, document.title, document.length,
+                document.mtime_ns, document.size,
+                [[section.token_start, section.offset, section.anchor, section.heading]
+                 for section in document.sections],
+                offsets_written
+            ])
+            offsets_written += len(document.offsets)
+        char_len = f.tell() - char_off
+
+        terms_off = f.tell()
+        f.write(term_bytes)
+        # Keep the term table aligned for its u32 view
+        f.write(b'\0' * (-f.tell() % table.itemsize))
+        table_off = f.tell()
+        table.tofile(f)
+        meta_off = f.tell()
+        encoded_meta = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+        f.write(encoded_meta)
+
+        # Trigrams sort by code point, which is also the order of their UTF-8 bytes
+        gram_bytes = bytearray()
+        gram_table = array('I')
+        gram_terms = array('I')
+        for trigram in sorted(gram_ordinals):
+            encoded = trigram.encode('utf-8')
+            gram_table.extend((len(gram_bytes), len(encoded), len(gram_terms), len(gram_ordinals[trigram])))
+            gram_bytes.extend(encoded)
+            gram_terms.extend(gram_ordinals[trigram])
+        grams_off = f.tell()
+        f.write(gram_bytes)
+        f.write(b'\0' * (-f.tell() % gram_table.itemsize))
+        gram_table_off = f.tell()
+        gram_table.tofile(f)
+        gram_terms_off = f.tell()
+        gram_terms.tofile(f)
+
+        f.seek(0)
+        f.write(HEADER.pack(
+            MAGIC, sys.byteorder.encode(),
+            postings_off, postings_len, char_off, char_len,
+            terms_off, len(term_bytes), table_off, len(table) * table.itemsize,
+            meta_off, len(encoded_meta), grams_off, len(gram_bytes),
+            gram_table_off, len(gram_table) * gram_table.itemsize,
+            gram_terms_off, len(gram_terms) * gram_terms.itemsize
+        ))
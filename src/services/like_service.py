@@ -1,13 +1,28 @@
-import json
 import os
-from typing import Dict
+import threading
+from typing import Dict, List
 from pathlib import Path
-from flask import request, make_response
+from flask import make_response
 from ..config.settings import Config
 from ..models.like_models import CourseLike
+from ..models.user_state_models import UserState
+from ..utils.like_journal import LikeJournal
+from ..utils.like_store import SQLiteLikeStore
+from .ordinal_service import OrdinalService
+from .user_state_service import UserStateService
 
 class LikeService:
-    """Service class for managing course likes"""
+    """Service class for managing course likes.
+    
+    Config.LIKES_BACKEND selects where counts are kept: 'journal' holds
+    them in memory and appends every change to a journal next to
+    likes.json (see LikeJournal); 'sqlite' keeps them in a SQLite
+    database (see SQLiteLikeStore). Neither rewrites a file per click.
+    """
+    
+    _store = None
+    _store_key = None
+    _store_lock = threading.Lock()
     
     @staticmethod
     def _get_likes_file_path() -> Path:
@@ -15,72 +30,71 @@ class LikeService:
         return Config.DATA_FOLDER / 'likes.json'
     
     @staticmethod
-    def _load_likes_data() -> Dict[str, int]:
-        """Load likes data from file"""
+    def _get_store():
+        """Get the like counters of the configured backend, opening them on first use"""
         likes_file = LikeService._get_likes_file_path()
-        if likes_file.exists():
-            try:
-                with open(likes_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-    
-    @staticmethod
-    def _save_likes_data(likes_data: Dict[str, int]) -> bool:
-        """Save likes data to file"""
-        try:
-            likes_file = LikeService._get_likes_file_path()
-            # Create data directory if it doesn't exist
-            likes_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(likes_file, 'w') as f:
-                json.dump(likes_data, f, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error saving likes data: {e}")
-            return False
+        store_key = (Config.LIKES_BACKEND, likes_file)
+        if LikeService._store_key != store_key:
+            with LikeService._store_lock:
+                if LikeService._store_key != store_key:
+                    if Config.LIKES_BACKEND == 'journal':
+                        store = LikeJournal(
+                            likes_file,
+                            fsync_interval=Config.LIKES_FSYNC_INTERVAL,
+                            sync_interval=Config.LIKES_SYNC_INTERVAL,
+                            compact_interval=Config.LIKES_COMPACT_INTERVAL,
+                            compact_bytes=Config.LIKES_COMPACT_BYTES
+                        )
+                    elif Config.LIKES_BACKEND == 'sqlite':
+                        store = SQLiteLikeStore(Config.DATA_FOLDER / Config.LIKES_DB_FILENAME, legacy_path=likes_file)
+                    else:
+                        raise ValueError(f"Unknown likes backend: {Config.LIKES_BACKEND}")
+                    LikeService._store = store
+                    LikeService._store_key = store_key
+        return LikeService._store
     
     @staticmethod
     def get_course_likes(course_id: str) -> int:
         """Get the number of likes for a course"""
-        likes_data = LikeService._load_likes_data()
-        return likes_data.get(course_id, 0)
+        return LikeService._get_store().get(course_id)
     
     @staticmethod
     def add_like(course_id: str) -> int:
         """Add a like to a course and return the new count"""
-        likes_data = LikeService._load_likes_data()
-        current_likes = likes_data.get(course_id, 0)
-        likes_data[course_id] = current_likes + 1
-        if LikeService._save_likes_data(likes_data):
-            return likes_data[course_id]
-        return current_likes
+        try:
+            return LikeService._get_store().add(course_id, 1)
+        except Exception as e:
+            print(f"Error saving like: {e}")
+            return LikeService.get_course_likes(course_id)
     
     @staticmethod
     def remove_like(course_id: str) -> int:
         """Remove a like from a course and return the new count"""
-        likes_data = LikeService._load_likes_data()
-        current_likes = likes_data.get(course_id, 0)
-        if current_likes > 0:
-            likes_data[course_id] = current_likes - 1
-            if LikeService._save_likes_data(likes_data):
-                return likes_data[course_id]
-        return current_likes
+        try:
+            return LikeService._get_store().add(course_id, -1)
+        except Exception as e:
+            print(f"Error saving like: {e}")
+            return LikeService.get_course_likes(course_id)
+    
+    @staticmethod
+    def get_likes(course_ids: List[str]) -> Dict[str, int]:
+        """Get the number of likes for several courses from one load"""
+        likes_data = LikeService.get_all_likes()
+        return {course_id: likes_data.get(course_id, 0) for course_id in course_ids}
     
     @staticmethod
     def get_all_likes() -> Dict[str, int]:
         """Get likes for all courses"""
-        return LikeService._load_likes_data()
+        return LikeService._get_store().counts()
     
     @staticmethod
     def get_user_liked_courses() -> Dict[str, bool]:
         """Get courses that the current user has liked from cookies"""
-        liked_courses_cookie = request.cookies.get('liked_courses', '{}')
-        try:
-            return json.loads(liked_courses_cookie)
-        except:
+        bits = UserStateService.get_state().liked_courses
+        if not bits:
             return {}
+        course_ids = OrdinalService.course_ids()
+        return {course_ids[ordinal]: True for ordinal in UserState.members(bits) if ordinal in course_ids}
     
     @staticmethod
     def add_user_like(course_id: str) -> Dict[str, bool]:
@@ -100,9 +114,6 @@ class LikeService:
     @staticmethod
     def create_liked_response(response, liked_courses: Dict[str, bool]):
         """Add liked courses tracking cookie to response"""
-        response.set_cookie(
-            'liked_courses', 
-            json.dumps(liked_courses), 
-            max_age=30 * 24 * 60 * 60  # 30 days
-        )
+        # Written to the user state cookie once the request is done
+        UserStateService.set_liked_courses(liked_courses)
         return response
\ No newline at end of file
@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+from ..config.settings import Config
+from ..utils.helpers import atomic_write, file_lock
+from .snapshot_service import SnapshotService
+
+ORDINALS_VERSION = 1
+
+class OrdinalService:
+    """Service class assigning stable small numbers to courses and documents.
+
+    The user state cookie stores liked courses and read documents as
+    bitsets over these ordinals. An ordinal is never reassigned, even
+    after its document is deleted, so an old cookie keeps meaning the
+    same documents. Ordinals are persisted under DATA_FOLDER and shared
+    by every worker; they are only handed out for content that exists.
+    """
+
+    _courses: Dict[str, int] = {}
+    _documents: Dict[str, Dict[str, int]] = {}
+    _course_ids: Dict[int, str] = {}
+    _filenames: Dict[str, Dict[int, str]] = {}
+    _file_id: Optional[Tuple[int, int, int]] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _ordinals_path():
+        return Config.DATA_FOLDER / Config.DOC_ORDINALS_FILENAME
+
+    @staticmethod
+    def course_ordinal(course_id: str, assign: bool = False) -> Optional[int]:
+        """Get a course's ordinal, assigning one to an existing course when assign is set"""
+        with OrdinalService._lock:
+            OrdinalService._reload()
+            ordinal = OrdinalService._courses.get(course_id)
+            if ordinal is None and assign and SnapshotService.current().get_course(course_id):
+                ordinal = OrdinalService._assign(course_id, None)
+            return ordinal
+
+    @staticmethod
+    def document_ordinal(course_id: str, filename: str, assign: bool = False) -> Optional[int]:
+        """Get a document's ordinal within its course, assigning one to an existing document when assign is set"""
+        with OrdinalService._lock:
+            OrdinalService._reload()
+            ordinal = OrdinalService._documents.get(course_id, {}).get(filename)
+            if ordinal is None and assign and SnapshotService.current().has_document(course_id, filename):
+                ordinal = OrdinalService._assign(course_id, filename)
+            return ordinal
+
+    @staticmethod
+    def course_ids() -> Dict[int, str]:
+        """Get the course id of every course ordinal"""
+        with OrdinalService._lock:
+            OrdinalService._reload()
+            return OrdinalService._course_ids
+
+    @staticmethod
+    def document_filenames(course_id: str) -> Dict[int, str]:
+        """Get the filename of every document ordinal of a course"""
+        with OrdinalService._lock:
+            OrdinalService._reload()
+            return OrdinalService._filenames.get(course_id, {})
+
+    @staticmethod
+    def _reload(force: bool = False):
+        """Load the ordinals file when another worker has changed it"""
+        path = OrdinalService._ordinals_path()
+        try:
+            stat = os.stat(path)
+            file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            file_id = None
+        if file_id == OrdinalService._file_id and not force:
+            return
+
+        courses, documents = {}, {}
+        if file_id is not None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == ORDINALS_VERSION:
+                    courses, documents = data['courses'], data['documents']
+            except Exception as e:
+                print(f"Error loading document ordinals: {e}")
+                # Keep the ordinals already loaded rather than handing out conflicting ones
+                return
+        # Published as new objects, so maps returned earlier are never modified
+        OrdinalService._courses = courses
+        OrdinalService._documents = documents
+        OrdinalService._course_ids = {ordinal: course_id for course_id, ordinal in courses.items()}
+        OrdinalService._filenames = {
+            course_id: {ordinal: filename for filename, ordinal in course_documents.items()}
+            for course_id, course_documents in documents.items()
+        }
+        OrdinalService._file_id = file_id
+
+    @staticmethod
+    def _assign(course_id: str, filename: Optional[str]) -> Optional[int]:
+        """Assign the next ordinal under the file lock, so workers never hand out the same one"""
+        path = OrdinalService._ordinals_path()
+        with file_lock(path.with_suffix('.lock')):
+            OrdinalService._reload()
+
+            courses = dict(OrdinalService._courses)
+            documents = {key: dict(value) for key, value in OrdinalService._documents.items()}
+            if course_id not in courses:
+                courses[course_id] = len(courses)
+            if filename is None:
+                ordinal = courses[course_id]
+            else:
+                course_documents = documents.setdefault(course_id, {})
+                if filename not in course_documents:
+                    course_documents[filename] = len(course_documents)
+                ordinal = course_documents[filename]
+
+            try:
+                with atomic_write(path) as f:
+                    json.dump({'version': ORDINALS_VERSION, 'courses': courses, 'documents': documents},
+                              f, separators=(',', ':'))
+            except Exception as e:
+                print(f"Error saving document ordinals: {e}")
+                return None
+            OrdinalService._reload(force=True)
+            return ordinal
\ No newline at end of file
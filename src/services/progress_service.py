@@ -1,7 +1,7 @@
-import json
-from typing import Dict, Any
-from flask import request, make_response
-from ..config.settings import Config
+from typing import Dict
+from ..models.user_state_models import UserState
+from .ordinal_service import OrdinalService
+from .user_state_service import UserStateService
 
 class UserProgressService:
     """Service class for user progress tracking"""
@@ -9,12 +9,21 @@ class UserProgressService:
     @staticmethod
     def get_user_progress(course_id: str) -> Dict[str, bool]:
         """Get user's progress for a specific course from cookies"""
-        progress_key = f"course_progress_{course_id}"
-        progress_data = request.cookies.get(progress_key, "{}")
-        try:
-            return json.loads(progress_data)
-        except:
+        bits = UserStateService.get_progress_bits(course_id)
+        if not bits:
             return {}
+        filenames = OrdinalService.document_filenames(course_id)
+        return {filenames[ordinal]: True for ordinal in UserState.members(bits) if ordinal in filenames}
+    
+    @staticmethod
+    def get_completed_counts() -> Dict[str, int]:
+        """Get the number of documents a user has read in every course they have progress in"""
+        course_ids = OrdinalService.course_ids()
+        return {
+            course_ids[course]: UserState.count(bits)
+            for course, bits in UserStateService.get_state().progress.items()
+            if bits and course in course_ids
+        }
     
     @staticmethod
     def add_document_to_progress(course_id: str, doc_filename: str) -> Dict[str, bool]:
@@ -27,10 +36,6 @@ class UserProgressService:
     @staticmethod
     def create_progress_response(response, course_id: str, progress: Dict[str, bool]):
         """Add progress tracking cookie to response"""
-        progress_key = f"course_progress_{course_id}"
-        response.set_cookie(
-            progress_key, 
-            json.dumps(progress), 
-            max_age=Config.COOKIE_MAX_AGE
-        )
+        # Written to the user state cookie once the request is done
+        UserStateService.set_progress(course_id, progress)
         return response
\ No newline at end of file
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import threading
+import markdown
+import pygments
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from ..models.course_models import Document
+from ..utils.helpers import extract_title_from_markdown, atomic_write
+from ..utils.markdown_pool import MarkdownPool
+from ..utils.highlight_cache import install_highlight_cache
+from ..config.settings import Config
+
+class RenderService:
+    """Service class for rendering course documents, backed by an on-disk HTML cache.
+
+    Each document has a cache entry holding its rendered HTML and TOC,
+    the source file's size and mtime, and a hash of the source plus the
+    renderer configuration. A matching stat answers from the cache
+    without reading the source; otherwise the hash decides whether the
+    document really needs to be rendered again.
+    """
+
+    EXTENSIONS = [
+        'abbr', 'attr_list', 'def_list', 'fenced_code', 'footnotes', 'md_in_html',
+        'tables', 'admonition', 'codehilite', 'legacy_attrs', 'legacy_em',
+        'meta', 'nl2br', 'sane_lists', 'smarty', 'toc', 'wikilinks'
+    ]
+    EXTENSION_CONFIGS: Dict[str, Dict] = {}
+
+    # Lighter profile used for the admin editor's live preview
+    PREVIEW_EXTENSIONS = ['tables', 'fenced_code', 'codehilite', 'toc', 'nl2br', 'sane_lists']
+
+    _config_digest: Optional[str] = None
+    _pools: Dict[str, MarkdownPool] = {}
+    _pools_lock = threading.Lock()
+
+    @staticmethod
+    def config_digest() -> str:
+        """Digest of everything besides the source that affects the rendered output"""
+        if RenderService._config_digest is None:
+            config = json.dumps([
+                RenderService.EXTENSIONS, RenderService.EXTENSION_CONFIGS,
+                markdown.__version__, pygments.__version__
+            ], sort_keys=True)
+            RenderService._config_digest = hashlib.sha256(config.encode('utf-8')).hexdigest()
+        return RenderService._config_digest
+
+    @staticmethod
+    def content_key(content: str) -> str:
+        """Cache key for a document source under the current renderer configuration"""
+        digest = hashlib.sha256(RenderService.config_digest().encode('utf-8'))
+        digest.update(content.encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _pool(profile: str) -> MarkdownPool:
+        pool = RenderService._pools.get(profile)
+        if pool is None:
+            with RenderService._pools_lock:
+                pool = RenderService._pools.get(profile)
+                if pool is None:
+                    install_highlight_cache(Config.HIGHLIGHT_CACHE_MAX_BLOCKS)
+                    if profile == 'preview':
+                        pool = MarkdownPool(RenderService.PREVIEW_EXTENSIONS, max_idle=Config.MARKDOWN_POOL_SIZE)
+                    else:
+                        pool = MarkdownPool(RenderService.EXTENSIONS, RenderService.EXTENSION_CONFIGS,
+                                            max_idle=Config.MARKDOWN_POOL_SIZE)
+                    RenderService._pools[profile] = pool
+        return pool
+
+    @staticmethod
+    def render_markdown(content: str, profile: str = 'document') -> Tuple[str, str]:
+        """Convert markdown to (html, toc) with a pooled converter for the profile"""
+        return RenderService._pool(profile).convert(content)
+
+    @staticmethod
+    def course_cache_folder(course_id: str) -> Path:
+        """Folder holding the cache entries of a course's documents"""
+        return Config.DATA_FOLDER / Config.RENDER_CACHE_DIRNAME / course_id
+
+    @staticmethod
+    def cache_path(course_id: str, filename: str) -> Path:
+        """Path of the cache entry for a course document"""
+        return RenderService.course_cache_folder(course_id) / f'{filename}.json'
+
+    @staticmethod
+    def render_document(course_id: str, filename: str) -> Document:
+        """Render a course document, reusing cached HTML while its content is unchanged"""
+        return RenderService.render_file(
+            Config.COURSES_FOLDER / course_id / 'docs' / filename,
+            RenderService.cache_path(course_id, filename)
+        )
+
+    @staticmethod
+    def render_file(source_path: Path, cache_path: Path, content: Optional[str] = None,
+                    stat: Optional[os.stat_result] = None) -> Document:
+        """Render a markdown file through its cache entry.
+
+        When content is given, stat must have been taken before it was read,
+        so a concurrent edit can only make the entry look stale, never fresh.
+        """
+        if stat is None:
+            stat = source_path.stat()
+        digest = RenderService.config_digest()
+        entry = RenderService._read_entry(cache_path)
+        if (entry is not None and entry['config'] == digest
+                and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size):
+            return RenderService._to_document(source_path.name, entry)
+
+        if content is None:
+            content = source_path.read_text(encoding='utf-8')
+        key = RenderService.content_key(content)
+        if entry is None or entry['key'] != key:
+            html_content, toc = RenderService.render_markdown(content)
+            entry = {
+                'key': key,
+                'config': digest,
+                'title': extract_title_from_markdown(content, source_path.name),
+                'html': html_content,
+                'toc': toc
+            }
+        entry['mtime_ns'] = stat.st_mtime_ns
+        entry['size'] = stat.st_size
+        RenderService._write_entry(cache_path, entry)
+        return RenderService._to_document(source_path.name, entry)
+
+    @staticmethod
+    def invalidate(course_id: str, filename: str):
+        """Drop the cache entry of a deleted document; saved ones fail the stat check and are re-keyed"""
+        try:
+            RenderService.cache_path(course_id, filename).unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error removing rendered document: {e}")
+
+    @staticmethod
+    def _to_document(filename: str, entry: Dict) -> Document:
+        return Document(filename=filename, title=entry['title'], content=entry['html'], toc=entry['toc'],
+                        size=entry['size'], mtime_ns=entry['mtime_ns'])
+
+    @staticmethod
+    def _read_entry(cache_path: Path) -> Optional[Dict]:
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading rendered document {cache_path}: {e}")
+            return None
+
+    @staticmethod
+    def _write_entry(cache_path: Path, entry: Dict):
+        try:
+            with atomic_write(cache_path) as f:
+                json.dump(entry, f)
+        except Exception as e:
+            print(f"Error caching rendered document {cache_path}: {e}")
\ No newline at end of file
@@ -1,69 +1,358 @@
-import re
+import heapq
 import json
+import math
 import os
-from typing import List, Dict
+from bisect import bisect_right
+from typing import List, Dict, Optional, Set, Tuple
 from pathlib import Path
+from markupsafe import Markup
 from ..services.course_service import CourseService
-from ..utils.helpers import extract_title_from_markdown, sanitize_path
+from ..services.index_service import IndexService
+from ..utils.aho_corasick import AhoCorasick
+from ..utils.helpers import sanitize_path, TOKEN_RE
+from ..utils.query_parser import parse_query
+from ..utils.safe_regex import SafeRegex, StepBudget, RegexError, RegexBudgetExceeded
 from ..config.settings import Config
-from .. import cache
+from .cache_service import CacheService
 
 class SearchService:
     """Service class for search operations"""
     
+    # BM25 parameters and boosts for matches in the title or a heading
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    TITLE_BOOST = 2.0
+    HEADING_BOOST = 1.0
+    
+    # Results computed from an index file that has since been replaced are never served
+    @staticmethod
+    @CacheService.memoize(lambda query, page, per_page: [CacheService.SEARCH,
+                                                         CacheService.index_tag(IndexService.file_version())])
+    def search_documents(query: str, page: int = 1, per_page: int = 10) -> Tuple[List[Dict], int, Optional[str]]:
+        """Search documents for literal terms and phrases, ranked by BM25.
+        
+        Returns one page of results, the total number of matches and an
+        error message for invalid or over-budget pattern searches.
+        """
+        parsed = parse_query(query)
+        if page < 1 or per_page < 1:
+            return [], 0, None
+        if parsed.pattern is not None:
+            return SearchService._search_pattern(parsed.pattern, page, per_page)
+        
+        results = []
+        terms = parsed.all_terms
+        if not terms:
+            return results, 0, None
+        
+        index = IndexService.get_index()
+        
+        # Intersect postings starting from the rarest term
+        term_postings_map = {term: index.lookup(term) for term in terms}
+        postings = sorted(term_postings_map.values(), key=len)
+        doc_ids = set(postings[0])
+        for term_postings in postings[1:]:
+            doc_ids.intersection_update(term_postings)
+            if not doc_ids:
+                return results, 0, None
+        
+        # Phrases must appear as consecutive terms
+        phrase_positions = {}
+        for doc_id in list(doc_ids):
+            positions = [SearchService._phrase_position(phrase, doc_id, term_postings_map)
+                         for phrase in parsed.phrases]
+            if None in positions:
+                doc_ids.discard(doc_id)
+            elif positions:
+                phrase_positions[doc_id] = positions[0]
+        
+        # Keep only as many of the best hits as needed to fill the requested page
+        limit = page * per_page
+        scored = ((SearchService._score(index, doc_id, term_postings_map), doc_id) for doc_id in doc_ids)
+        top_hits = heapq.nlargest(limit, scored)
+        
+        matcher = AhoCorasick(terms)
+        for score, doc_id in top_hits[limit - per_page:]:
+            document = index.get_document(doc_id)
+            content = SearchService._read_document(document.course_id, document.filename) if document else None
+            if content is None:
+                continue
+            
+            # Link to the section holding the phrase, or else the one with the most hits
+            sections = SearchService._matching_sections(document, doc_id, term_postings_map)
+            if doc_id in phrase_positions:
+                offset = document.offsets[phrase_positions[doc_id]]
+                anchor = document.section_at_offset(offset).anchor
+            else:
+                best = max(sections, key=lambda section: section['hits'])
+                offset, anchor = best['offset'], best['anchor']
+            
+            # The snippet is cut straight from the indexed offset
+            results.append(SearchService._make_result(
+                document.course_id, document.filename, document.title,
+                SearchService._make_snippet(content, offset, matcher=matcher),
+                anchor=anchor,
+                sections=sections,
+                score=round(score, 3)
+            ))
+        
+        return results, len(doc_ids), None
+    
+    @staticmethod
+    @CacheService.memoize(lambda query: [CacheService.SEARCH, CacheService.index_tag(IndexService.file_version())])
+    def suggest_correction(query: str) -> Optional[str]:
+        """Rewrite a query, replacing unknown terms with the closest indexed terms.
+        
+        Returns None when every term is known or no close term exists.
+        """
+        parsed = parse_query(query)
+        if parsed.pattern is not None:
+            return None
+        
+        index = IndexService.get_index()
+        corrections = {}
+        for term in parsed.all_terms:
+            if len(term) < 3 or index.document_frequency(term):
+                continue
+            # Prefer the closest term, then the one found in most documents
+            similar = index.similar_terms(term)
+            if similar:
+                best_distance = similar[0][0]
+                corrections[term] = max(
+                    (candidate for distance, candidate in similar if distance == best_distance),
+                    key=index.document_frequency
+                )
+        
+        if not corrections:
+            return None
+        
+        parts = [corrections.get(term, term) for term in parsed.terms]
+        parts.extend('"%s"' % ' '.join(corrections.get(term, term) for term in phrase) for phrase in parsed.phrases)
+        return ' '.join(parts)
+    
     @staticmethod
-    @cache.memoize(timeout=300)
-    def search_documents(query: str) -> List[Dict]:
-        """Search for documents containing the query"""
+    def _search_pattern(pattern: str, page: int, per_page: int) -> Tuple[List[Dict], int, Optional[str]]:
+        """Scan documents with a linear-time pattern under a fixed step budget"""
+        if len(pattern) > Config.SEARCH_PATTERN_MAX_LENGTH:
+            return [], 0, f'Patterns are limited to {Config.SEARCH_PATTERN_MAX_LENGTH} characters'
+        try:
+            regex = SafeRegex(pattern)
+        except RegexError as e:
+            return [], 0, f'Invalid pattern: {e}'
+        
+        budget = StepBudget(Config.SEARCH_PATTERN_STEP_BUDGET)
+        index = IndexService.get_index()
+        candidates = SearchService._pattern_candidates(regex, index)
+        documents = sorted(
+            (document for document in index.all_documents() if candidates is None or document.doc_id in candidates),
+            key=lambda doc: (doc.course_id, doc.filename)
+        )
+        first = (page - 1) * per_page
         results = []
+        total = 0
+        error = None
+        
+        for searched, document in enumerate(documents):
+            content = SearchService._read_document(document.course_id, document.filename)
+            if content is None:
+                continue
+            try:
+                span = regex.search(content, budget)
+            except RegexBudgetExceeded:
+                error = (f'The pattern was too expensive to run on every document; '
+                         f'results cover {searched} of {len(documents)} documents')
+                break
+            if span is None:
+                continue
+            
+            if first <= total < first + per_page:
+                section = document.section_at_offset(span[0])
+                results.append(SearchService._make_result(
+                    document.course_id, document.filename, document.title,
+                    SearchService._make_snippet(content, span[0], span=span),
+                    anchor=section.anchor,
+                    sections=[{'anchor': section.anchor, 'heading': section.heading, 'offset': span[0], 'hits': 1}]
+                ))
+            total += 1
+        
+        return results, total, error
+    
+    @staticmethod
+    def _pattern_candidates(regex: SafeRegex, index) -> Optional[Set[int]]:
+        """Get the ids of the documents whose terms hold the literal text a pattern requires.
+        
+        Returns None when the pattern requires nothing specific enough to
+        look up, in which case every document has to be scanned.
+        """
+        candidates = None
+        for clause in regex.literals:
+            clause_documents: Optional[Set[int]] = set()
+            for literal in clause:
+                literal_documents = SearchService._literal_documents(literal, index)
+                if literal_documents is None:
+                    clause_documents = None
+                    break
+                clause_documents |= literal_documents
+            if clause_documents is not None:
+                candidates = clause_documents if candidates is None else candidates & clause_documents
+        return candidates
+    
+    @staticmethod
+    def _literal_documents(literal: str, index) -> Optional[Set[int]]:
+        """Get the ids of the documents that could contain a literal, or None if it cannot be narrowed"""
+        documents = None
+        for match in TOKEN_RE.finditer(literal):
+            piece = match.group()
+            # A non-word character beside a piece marks a term boundary on that side
+            starts_term = match.start() > 0
+            ends_term = match.end() < len(literal)
+            if starts_term and ends_term:
+                terms = [piece]
+            elif len(piece) >= 3:
+                terms = index.terms_containing(piece, Config.SEARCH_PATTERN_MAX_TERMS)
+                if len(terms) > Config.SEARCH_PATTERN_MAX_TERMS:
+                    continue
+                terms = [term for term in terms
+                         if (not starts_term or term.startswith(piece)) and (not ends_term or term.endswith(piece))]
+            else:
+                continue
+            
+            piece_documents = set()
+            for term in terms:
+                piece_documents.update(index.lookup(term))
+            documents = piece_documents if documents is None else documents & piece_documents
+        return documents
+    
+    @staticmethod
+    def _phrase_position(phrase: List[str], doc_id: int, term_postings_map: Dict[str, Dict[int, List[int]]]) -> Optional[int]:
+        """Get the first position where a phrase occurs in a document"""
+        following = [set(term_postings_map[term][doc_id]) for term in phrase[1:]]
+        for position in term_postings_map[phrase[0]][doc_id]:
+            if all(position + i + 1 in positions for i, positions in enumerate(following)):
+                return position
+        return None
+    
+    @staticmethod
+    def _matching_sections(document, doc_id: int, term_postings_map: Dict[str, Dict[int, List[int]]]) -> List[Dict]:
+        """Group a document's term hits by section, in document order.
+        
+        Each section carries the indexed character offset of its first hit,
+        so snippets can be cut without searching the text again.
+        """
+        starts = [section.token_start for section in document.sections]
+        hits: Dict[int, List[int]] = {}
+        for term_postings in term_postings_map.values():
+            for position in term_postings[doc_id]:
+                section_index = max(bisect_right(starts, position) - 1, 0)
+                section_hits = hits.setdefault(section_index, [position, 0])
+                section_hits[0] = min(section_hits[0], position)
+                section_hits[1] += 1
+        
+        return [
+            {
+                'anchor': document.sections[section_index].anchor,
+                'heading': document.sections[section_index].heading,
+                'offset': document.offsets[first_position],
+                'hits': count
+            }
+            for section_index, (first_position, count) in sorted(hits.items())
+        ]
+    
+    @staticmethod
+    def _score(index, doc_id: int, term_postings_map: Dict[str, Dict[int, List[int]]]) -> float:
+        """Compute the BM25 score of a document, boosted by title and heading matches"""
+        document = index.get_document(doc_id)
+        if document is None:
+            return 0.0
         
-        if not query or not Config.COURSES_FOLDER.exists():
-            return results
-        
-        # Search across all courses
-        for course_dir in Config.COURSES_FOLDER.iterdir():
-            if course_dir.is_dir():
-                course_docs_path = course_dir / 'docs'
-                if course_docs_path.exists():
-                    for file_path in course_docs_path.iterdir():
-                        if file_path.suffix == '.md':
-                            try:
-                                content = file_path.read_text(encoding='utf-8')
-                                
-                                # Check if query is in content (case insensitive)
-                                if re.search(query, content, re.IGNORECASE):
-                                    # Extract title
-                                    title = extract_title_from_markdown(content, file_path.name)
-                                    
-                                    # Get course info
-                                    course_title = SearchService._get_course_title(course_dir.name)
-                                    
-                                    # Create snippet
-                                    content_lower = content.lower()
-                                    query_lower = query.lower()
-                                    index = content_lower.find(query_lower)
-                                    start = max(0, index - 50)
-                                    end = min(len(content), index + 200)
-                                    snippet = content[start:end]
-                                    if start > 0:
-                                        snippet = '...' + snippet
-                                    if end < len(content):
-                                        snippet = snippet + '...'
-                                    
-                                    results.append({
-                                        'course_id': course_dir.name,
-                                        'filename': file_path.name,
-                                        'title': title,
-                                        'course_title': course_title,
-                                        'snippet': snippet
-                                    })
-                            except Exception:
-                                continue
-        
-        return results
+        total_docs = len(index)
+        length_norm = 1 - SearchService.BM25_B + SearchService.BM25_B * document.length / (index.average_length or 1)
+        score = 0.0
+        for term, term_postings in term_postings_map.items():
+            doc_freq = len(term_postings)
+            idf = math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+            term_freq = len(term_postings.get(doc_id, ()))
+            score += idf * term_freq * (SearchService.BM25_K1 + 1) / (term_freq + SearchService.BM25_K1 * length_norm)
+            if term in document.title_terms:
+                score += idf * SearchService.TITLE_BOOST
+            if term in document.heading_terms:
+                score += idf * SearchService.HEADING_BOOST
+        return score
+    
+    @staticmethod
+    def _make_result(course_id: str, filename: str, title: str, snippet: str, **extra) -> Dict:
+        """Assemble a search result entry"""
+        result = {
+            'course_id': course_id,
+            'filename': filename,
+            'title': title,
+            'course_title': SearchService._get_course_title(course_id),
+            'snippet': snippet
+        }
+        result.update(extra)
+        return result
+    
+    @staticmethod
+    def _read_document(course_id: str, filename: str) -> Optional[str]:
+        """Read the markdown source of a document"""
+        try:
+            return (Config.COURSES_FOLDER / course_id / 'docs' / filename).read_text(encoding='utf-8')
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _make_snippet(content: str, offset: int, matcher: Optional[AhoCorasick] = None,
+                      span: Optional[Tuple[int, int]] = None) -> Markup:
+        """Cut an escaped snippet around a character offset with matches highlighted"""
+        start = max(0, offset - 50)
+        end = min(len(content), offset + 200)
+        window = content[start:end]
+        
+        if span is not None:
+            spans = [(max(span[0], start) - start, min(span[1], end) - start)]
+        elif matcher is not None:
+            spans = SearchService._term_spans(window, matcher)
+        else:
+            spans = []
+        
+        snippet = Markup('...') if start > 0 else Markup()
+        last = 0
+        for span_start, span_end in spans:
+            if span_start >= span_end:
+                continue
+            snippet += window[last:span_start] + Markup('<mark>%s</mark>') % window[span_start:span_end]
+            last = span_end
+        snippet += window[last:]
+        if end < len(content):
+            snippet += Markup('...')
+        return snippet
+    
+    @staticmethod
+    def _term_spans(text: str, matcher: AhoCorasick) -> List[Tuple[int, int]]:
+        """Find non-overlapping whole-word term matches in one pass over text"""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            return []
+        
+        spans = []
+        for start, end, _ in matcher.finditer(lowered):
+            if SearchService._is_word_char(lowered, start - 1) or SearchService._is_word_char(lowered, end):
+                continue
+            # Matches arrive ordered by end; a longer match replaces those it covers
+            while spans and spans[-1][0] >= start:
+                spans.pop()
+            if spans and spans[-1][1] > start:
+                continue
+            spans.append((start, end))
+        return spans
+    
+    @staticmethod
+    def _is_word_char(text: str, pos: int) -> bool:
+        """Check whether the character at pos is part of a word"""
+        return 0 <= pos < len(text) and text[pos].isalnum()
     
     @staticmethod
-    @cache.memoize(timeout=300)
+    @CacheService.memoize(lambda course_id: [CacheService.course_tag(course_id)])
     def _get_course_title(course_id: str) -> str:
         """Get course title from course info or format course ID"""
         if not sanitize_path(course_id):
@@ -0,0 +1,87 @@
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, Optional
+from ..models.course_models import CatalogCourse, ContentSnapshot
+from ..config.settings import Config
+from .catalog_service import CatalogService
+
+class SnapshotService:
+    """Service class publishing the catalog as an immutable snapshot.
+
+    Readers take the current snapshot with a plain attribute read and
+    never lock or touch the filesystem. Rebuilds happen on writes and in
+    a background thread that revalidates the catalog, and publish the
+    new snapshot with a single reference swap, so a request that holds a
+    snapshot sees one consistent view throughout.
+    """
+
+    _snapshot: Optional[ContentSnapshot] = None
+    _source: Optional[Dict[str, CatalogCourse]] = None
+    _lock = threading.Lock()
+    _thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def current() -> ContentSnapshot:
+        """Get the current snapshot"""
+        snapshot = SnapshotService._snapshot
+        if snapshot is None:
+            with SnapshotService._lock:
+                if SnapshotService._snapshot is None:
+                    SnapshotService._publish(CatalogService.get_catalog())
+                    SnapshotService._start_refresher()
+                snapshot = SnapshotService._snapshot
+        return snapshot
+
+    @staticmethod
+    def refresh_course(course_id: str):
+        """Re-list a changed course and publish a snapshot that includes the change"""
+        CatalogService.refresh_course(course_id)
+        with SnapshotService._lock:
+            SnapshotService._publish(CatalogService.get_catalog())
+
+    @staticmethod
+    def _start_refresher():
+        if SnapshotService._thread is None:
+            thread = threading.Thread(target=SnapshotService._refresh_loop, name='snapshot-refresher', daemon=True)
+            SnapshotService._thread = thread
+            thread.start()
+
+    @staticmethod
+    def _refresh_loop():
+        """Pick up changes the catalog finds when it revalidates against the filesystem"""
+        while True:
+            time.sleep(Config.CATALOG_CHECK_INTERVAL)
+            try:
+                catalog = CatalogService.get_catalog()
+                if catalog is not SnapshotService._source:
+                    with SnapshotService._lock:
+                        SnapshotService._publish(CatalogService.get_catalog())
+            except Exception as e:
+                print(f"Error refreshing content snapshot: {e}")
+
+    @staticmethod
+    def _publish(catalog: Dict[str, CatalogCourse]):
+        """Build a snapshot of a catalog and swap it in (caller holds the lock)"""
+        if catalog is SnapshotService._source and SnapshotService._snapshot is not None:
+            return
+
+        courses = tuple(sorted((entry.course for entry in catalog.values()), key=lambda course: course.title))
+        documents = {}
+        navigation = {}
+        for course_id, entry in catalog.items():
+            docs = tuple(entry.documents)
+            documents[course_id] = docs
+            for i, doc in enumerate(docs):
+                navigation[(course_id, doc.filename)] = (
+                    docs[i - 1] if i > 0 else None,
+                    docs[i + 1] if i + 1 < len(docs) else None
+                )
+
+        SnapshotService._snapshot = ContentSnapshot(
+            courses=courses,
+            courses_by_id=MappingProxyType({course_id: entry.course for course_id, entry in catalog.items()}),
+            documents=MappingProxyType(documents),
+            navigation=MappingProxyType(navigation)
+        )
+        SnapshotService._source = catalog
\ No newline at end of file
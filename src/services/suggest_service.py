@@ -0,0 +1,237 @@
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+from ..utils.helpers import extract_title_from_markdown, split_markdown_sections
+
+# (key, label, kind, course_id, filename, anchor)
+SuggestEntry = Tuple[str, str, str, str, str, str]
+
+class SuggestIndex:
+    """Sorted prefix index over course titles, document titles and headings.
+
+    Every label is keyed once per word so that "sea" also finds
+    "Binary Search". Lookups bisect into the sorted entry list; updates
+    build a new list and swap it in, so readers never take a lock.
+    """
+
+    # Changes larger than this rebuild the sorted list instead of splicing into it
+    BISECT_MAX_CHANGES = 1000
+
+    def __init__(self):
+        self._entries: List[SuggestEntry] = []
+        self._sources: Dict[tuple, List[SuggestEntry]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return ' '.join(text.lower().split())
+
+    @staticmethod
+    def _make_entries(labels: List[Tuple[str, str, str, str, str]]) -> List[SuggestEntry]:
+        entries = []
+        for label, kind, course_id, filename, anchor in labels:
+            words = SuggestIndex._normalize(label).split(' ')
+            for i in range(len(words)):
+                if words[i]:
+                    entries.append((' '.join(words[i:]), label, kind, course_id, filename, anchor))
+        return entries
+
+    def load(self, sources: Dict[tuple, List[Tuple[str, str, str, str, str]]]):
+        """Replace the whole index with labels grouped by source"""
+        new_sources = {source: self._make_entries(labels) for source, labels in sources.items()}
+        entries = sorted(entry for source_entries in new_sources.values() for entry in source_entries)
+        with self._lock:
+            self._sources = new_sources
+            self._entries = entries
+
+    def set_source(self, source: tuple, labels: List[Tuple[str, str, str, str, str]]):
+        """Replace the labels contributed by one course or document"""
+        self.set_sources({source: labels})
+
+    def set_sources(self, sources: Dict[tuple, List[Tuple[str, str, str, str, str]]]):
+        """Replace the labels contributed by several courses or documents in one pass"""
+        if not sources:
+            return
+        new_sources = {source: self._make_entries(labels) for source, labels in sources.items()}
+        with self._lock:
+            old_entries = []
+            new_entries = []
+            for source, source_entries in new_sources.items():
+                old_entries.extend(self._sources.pop(source, ()))
+                if source_entries:
+                    self._sources[source] = source_entries
+                    new_entries.extend(source_entries)
+
+            if len(old_entries) + len(new_entries) > self.BISECT_MAX_CHANGES:
+                removed = set(old_entries)
+                entries = [entry for entry in self._entries if entry not in removed] + new_entries
+                entries.sort()
+            else:
+                # A few edits are spliced into a copy rather than scanning and sorting every entry
+                entries = list(self._entries)
+                for entry in old_entries:
+                    i = bisect_left(entries, entry)
+                    if i < len(entries) and entries[i] == entry:
+                        del entries[i]
+                for entry in new_entries:
+                    insort(entries, entry)
+            self._entries = entries
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[SuggestEntry]:
+        """Get up to limit distinct entries whose words start with prefix"""
+        prefix = self._normalize(prefix)
+        if not prefix:
+            return []
+
+        entries = self._entries
+        results = []
+        seen = set()
+        i = bisect_left(entries, (prefix,))
+        while i < len(entries) and len(results) < limit and entries[i][0].startswith(prefix):
+            entry = entries[i]
+            if entry[1:] not in seen:
+                seen.add(entry[1:])
+                results.append(entry)
+            i += 1
+        return results
+
+class SuggestService:
+    """Service class for search-as-you-type suggestions.
+
+    Edits made in this worker are applied as they happen. Edits seen by
+    another worker's watcher arrive as a new catalog snapshot or search
+    index file; only the courses whose titles and the documents whose
+    indexed size or mtime differ from those last applied are updated.
+    """
+
+    _index: Optional[SuggestIndex] = None
+    _built_from: tuple = (None, None)
+    _course_titles: Dict[str, str] = {}
+    _document_stats: Dict[Tuple[str, str], Tuple[int, int]] = {}
+    _build_lock = threading.Lock()
+
+    @staticmethod
+    def get_index() -> SuggestIndex:
+        """Get the suggestion index, catching up when the catalog snapshot or search index it came from is replaced"""
+        from .index_service import IndexService
+        from .snapshot_service import SnapshotService
+
+        snapshot, search_index = SnapshotService.current(), IndexService.get_index()
+        index = SuggestService._index
+        if index is not None and SuggestService._is_built_from(snapshot, search_index):
+            return index
+        # Readers keep the current suggestions while another thread updates them
+        if SuggestService._build_lock.acquire(blocking=index is None):
+            try:
+                if SuggestService._index is None:
+                    SuggestService._index = SuggestService._build(snapshot, search_index)
+                elif not SuggestService._is_built_from(snapshot, search_index):
+                    SuggestService._index.set_sources(SuggestService._changes(snapshot, search_index))
+                SuggestService._built_from = (snapshot, search_index)
+                index = SuggestService._index
+            finally:
+                SuggestService._build_lock.release()
+        return index
+
+    @staticmethod
+    def _is_built_from(snapshot, search_index) -> bool:
+        built_snapshot, built_search_index = SuggestService._built_from
+        return snapshot is built_snapshot and search_index is built_search_index
+
+    @staticmethod
+    def _build(snapshot, search_index) -> SuggestIndex:
+        """Build suggestions from a catalog snapshot and search index"""
+        sources = {}
+        for course in snapshot.courses:
+            sources[('course', course.id)] = SuggestService._course_labels(course.id, course.title)
+        for document in search_index.all_documents():
+            sources[('document', document.course_id, document.filename)] = SuggestService._indexed_labels(document)
+        SuggestService._course_titles = {course.id: course.title for course in snapshot.courses}
+        SuggestService._document_stats = search_index.document_stats()
+
+        index = SuggestIndex()
+        index.load(sources)
+        return index
+
+    @staticmethod
+    def _changes(snapshot, search_index) -> Dict[tuple, list]:
+        """Get the labels of the courses and documents that changed since the last build or catch-up"""
+        changes = {}
+        titles = {course.id: course.title for course in snapshot.courses}
+        for course_id in SuggestService._course_titles.keys() | titles.keys():
+            title = titles.get(course_id)
+            if title != SuggestService._course_titles.get(course_id):
+                changes[('course', course_id)] = [] if title is None else SuggestService._course_labels(course_id, title)
+
+        stats = search_index.document_stats()
+        for key in SuggestService._document_stats.keys() | stats.keys():
+            if stats.get(key) != SuggestService._document_stats.get(key):
+                document = search_index.find_document(*key) if key in stats else None
+                changes[('document',) + key] = [] if document is None else SuggestService._indexed_labels(document)
+
+        SuggestService._course_titles = titles
+        SuggestService._document_stats = stats
+        return changes
+
+    @staticmethod
+    def _indexed_labels(document) -> list:
+        headings = [(section.anchor, section.heading) for section in document.sections if section.anchor]
+        return SuggestService._document_labels(document.course_id, document.filename, document.title, headings)
+
+    @staticmethod
+    def _course_labels(course_id: str, title: str) -> list:
+        return [(title, 'course', course_id, '', '')]
+
+    @staticmethod
+    def _document_labels(course_id: str, filename: str, title: str, headings: List[Tuple[str, str]]) -> list:
+        labels = [(title, 'document', course_id, filename, '')]
+        for anchor, heading in headings:
+            if heading and heading != title:
+                labels.append((heading, 'section', course_id, filename, anchor))
+        return labels
+
+    @staticmethod
+    def suggest(prefix: str, limit: int = 8) -> List[Dict]:
+        """Get suggestions for a typed prefix"""
+        return [
+            {
+                'label': label,
+                'type': kind,
+                'course_id': course_id,
+                'filename': filename,
+                'anchor': anchor
+            }
+            for _, label, kind, course_id, filename, anchor in SuggestService.get_index().suggest(prefix, limit)
+        ]
+
+    @staticmethod
+    def update_course(course_id: str, title: str):
+        """Refresh suggestions after a course has been saved"""
+        SuggestService._set_source(('course', course_id), SuggestService._course_labels(course_id, title))
+
+    @staticmethod
+    def remove_course(course_id: str):
+        """Drop the suggestion for a deleted course"""
+        SuggestService._set_source(('course', course_id), [])
+
+    @staticmethod
+    def update_document(course_id: str, filename: str, content: str):
+        """Refresh suggestions after a document has been saved"""
+        headings = [(anchor, heading) for _, anchor, heading in split_markdown_sections(content) if anchor]
+        SuggestService._set_source(
+            ('document', course_id, filename),
+            SuggestService._document_labels(course_id, filename,
+                                             extract_title_from_markdown(content, filename), headings)
+        )
+
+    @staticmethod
+    def remove_document(course_id: str, filename: str):
+        """Drop suggestions for a deleted document"""
+        SuggestService._set_source(('document', course_id, filename), [])
+
+    @staticmethod
+    def _set_source(source: tuple, labels: list):
+        # Waits for a rebuild in progress, so the change is not made to the index it replaces
+        with SuggestService._build_lock:
+            if SuggestService._index is not None:
+                SuggestService._index.set_source(source, labels)
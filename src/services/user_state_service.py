@@ -0,0 +1,133 @@
+import base64
+import json
+from typing import Dict
+from flask import current_app, g, request
+from itsdangerous import BadSignature, Signer
+from ..config.settings import Config
+from ..models.user_state_models import UserState
+from .ordinal_service import OrdinalService
+
+class UserStateService:
+    """Service class for the signed cookie holding a user's progress and liked courses.
+
+    The state is decoded once per request, and every change made while
+    handling the request is written back in a single Set-Cookie. Users
+    still carrying the JSON cookies used before (one per course plus
+    liked_courses) have them folded into the state, which replaces them.
+    """
+
+    LEGACY_PROGRESS_PREFIX = 'course_progress_'
+    LEGACY_LIKED_COOKIE = 'liked_courses'
+
+    @staticmethod
+    def init_app(app):
+        """Write changed state back to the cookie after each request"""
+        app.after_request(UserStateService._save)
+
+    @staticmethod
+    def _signer() -> Signer:
+        return Signer(current_app.secret_key, salt='user-state')
+
+    @staticmethod
+    def get_state() -> UserState:
+        """Get the current user's state"""
+        state = g.get('user_state')
+        if state is None:
+            state = UserStateService._decode(request.cookies.get(Config.USER_STATE_COOKIE))
+            if UserStateService._migrate_legacy(state):
+                g.user_state_changed = True
+            g.user_state = state
+        return state
+
+    @staticmethod
+    def get_progress_bits(course_id: str) -> int:
+        """Get the bitset of documents the user has read in a course"""
+        course = OrdinalService.course_ordinal(course_id)
+        return UserStateService.get_state().progress.get(course, 0) if course is not None else 0
+
+    @staticmethod
+    def set_progress(course_id: str, progress: Dict[str, bool]):
+        """Replace the documents the user has read in a course"""
+        course = OrdinalService.course_ordinal(course_id, assign=True)
+        if course is None:
+            return
+        bits = 0
+        for filename, read in progress.items():
+            ordinal = OrdinalService.document_ordinal(course_id, filename, assign=True) if read else None
+            if ordinal is not None:
+                bits |= 1 << ordinal
+        state = UserStateService.get_state()
+        if state.progress.get(course, 0) != bits:
+            state.progress[course] = bits
+            g.user_state_changed = True
+
+    @staticmethod
+    def set_liked_courses(liked_courses: Dict[str, bool]):
+        """Replace the courses the user has liked"""
+        bits = 0
+        for course_id, liked in liked_courses.items():
+            ordinal = OrdinalService.course_ordinal(course_id, assign=True) if liked else None
+            if ordinal is not None:
+                bits |= 1 << ordinal
+        state = UserStateService.get_state()
+        if state.liked_courses != bits:
+            state.liked_courses = bits
+            g.user_state_changed = True
+
+    @staticmethod
+    def _decode(value: str) -> UserState:
+        if not value:
+            return UserState()
+        try:
+            payload = UserStateService._signer().unsign(value)
+            return UserState.from_bytes(base64.urlsafe_b64decode(payload + b'=' * (-len(payload) % 4)))
+        except (BadSignature, ValueError):
+            # Tampered with, or written by an incompatible version
+            return UserState()
+
+    @staticmethod
+    def _migrate_legacy(state: UserState) -> bool:
+        """Fold the JSON cookies used before the state cookie into state, returning whether any were found"""
+        found = False
+        for name, value in request.cookies.items():
+            if name == UserStateService.LEGACY_LIKED_COOKIE:
+                for course_id in UserStateService._legacy_keys(value):
+                    ordinal = OrdinalService.course_ordinal(course_id, assign=True)
+                    if ordinal is not None:
+                        state.liked_courses |= 1 << ordinal
+                found = True
+            elif name.startswith(UserStateService.LEGACY_PROGRESS_PREFIX):
+                course_id = name[len(UserStateService.LEGACY_PROGRESS_PREFIX):]
+                course = OrdinalService.course_ordinal(course_id, assign=True)
+                if course is not None:
+                    for filename in UserStateService._legacy_keys(value):
+                        ordinal = OrdinalService.document_ordinal(course_id, filename, assign=True)
+                        if ordinal is not None:
+                            state.progress[course] = state.progress.get(course, 0) | 1 << ordinal
+                found = True
+        return found
+
+    @staticmethod
+    def _legacy_keys(value: str):
+        try:
+            data = json.loads(value)
+        except ValueError:
+            return []
+        return [key for key, flag in data.items() if flag] if isinstance(data, dict) else []
+
+    @staticmethod
+    def _save(response):
+        if not g.get('user_state_changed'):
+            return response
+        payload = base64.urlsafe_b64encode(g.user_state.to_bytes()).rstrip(b'=')
+        response.set_cookie(
+            Config.USER_STATE_COOKIE,
+            UserStateService._signer().sign(payload).decode('ascii'),
+            max_age=Config.COOKIE_MAX_AGE,
+            httponly=True,
+            samesite='Lax'
+        )
+        for name in request.cookies:
+            if name == UserStateService.LEGACY_LIKED_COOKIE or name.startswith(UserStateService.LEGACY_PROGRESS_PREFIX):
+                response.delete_cookie(name)
+        return response
\ No newline at end of file
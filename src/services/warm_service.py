@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Set, Tuple
+from ..config.settings import Config
+from ..utils.helpers import hold_file_lock
+from .course_service import CourseService
+from .snapshot_service import SnapshotService
+
+class WarmService:
+    """Service class that renders documents in the background so readers find them cached.
+
+    Every document is warmed after startup by the one worker on the host
+    that holds the warm lock, and a document is warmed again by the
+    worker that sees an edit invalidate it. Requests for the same
+    document are collapsed while it is still waiting in the queue.
+    """
+
+    _app = None
+    _executor: Optional[ThreadPoolExecutor] = None
+    _pending: Set[Tuple[str, str]] = set()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def start(app, warm_all: bool = True):
+        """Start the warming pool, queueing every document when warm_all is set and this worker wins the warm lock"""
+        with WarmService._lock:
+            if WarmService._executor is not None:
+                return
+            WarmService._app = app
+            WarmService._executor = ThreadPoolExecutor(max_workers=Config.WARM_WORKERS,
+                                                       thread_name_prefix='cache-warmer')
+        if warm_all and hold_file_lock(Config.DATA_FOLDER / Config.WARM_LOCK_FILENAME):
+            WarmService._executor.submit(WarmService._warm_all)
+
+    @staticmethod
+    def warm_document(course_id: str, filename: str):
+        """Queue a document to be rendered into the cache"""
+        executor = WarmService._executor
+        if executor is None:
+            return
+        key = (course_id, filename)
+        with WarmService._lock:
+            if key in WarmService._pending:
+                return
+            WarmService._pending.add(key)
+        executor.submit(WarmService._warm, key)
+
+    @staticmethod
+    def _warm_all():
+        try:
+            snapshot = SnapshotService.current()
+            for course in snapshot.courses:
+                for document in snapshot.get_documents(course.id):
+                    WarmService.warm_document(course.id, document.filename)
+        except Exception as e:
+            print(f"Error queueing documents for warming: {e}")
+
+    @staticmethod
+    def _warm(key: Tuple[str, str]):
+        # Leave the queue before rendering, so an edit made meanwhile queues the document again
+        with WarmService._lock:
+            WarmService._pending.discard(key)
+        try:
+            with WarmService._app.app_context():
+                CourseService.read_course_document(*key)
+        except Exception as e:
+            print(f"Error warming document {key[0]}/{key[1]}: {e}")
\ No newline at end of file
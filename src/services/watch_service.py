@@ -0,0 +1,283 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Dict, Iterable, Optional, Set, Tuple
+from ..utils.helpers import format_title, hold_file_lock
+from ..config.settings import Config
+from .cache_service import CacheService
+from .index_service import IndexService
+from .render_service import RenderService
+from .snapshot_service import SnapshotService
+from .warm_service import WarmService
+from .suggest_service import SuggestService
+
+# inotify event masks from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+# ('course', course_id, '') or ('document', course_id, filename) -> (mtime_ns, size)
+Snapshot = Dict[Tuple[str, str, str], Tuple[int, int]]
+
+class _Inotify:
+    """Minimal inotify binding over libc"""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {path}')
+        return wd
+
+    def read_events(self) -> Iterable[Tuple[int, int, str]]:
+        """Read pending events as (watch descriptor, mask, name)"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            yield wd, mask, name
+
+    def close(self):
+        os.close(self.fd)
+
+class WatchService:
+    """Service class that keeps caches in line with edits made outside the admin panel.
+
+    Changes to course.json and docs/*.md files (git pulls, rsync) are
+    picked up by inotify on Linux, or by polling elsewhere, and only the
+    cache entries, index entries and suggestions of the files that
+    actually changed are refreshed.
+
+    With a shared cache one worker per host watches, elected by a lock
+    file; the others wait to take over. Their caches see the changes
+    through the shared cache tags, the catalog stats and the search index
+    file. A per-process cache has to be invalidated by its own process,
+    so then every worker watches.
+    """
+
+    _thread: Optional[threading.Thread] = None
+    _stop = threading.Event()
+    _snapshot: Snapshot = {}
+
+    @staticmethod
+    def start(app):
+        """Start watching the courses folder in a background thread"""
+        if WatchService._thread is not None:
+            return
+        WatchService._stop.clear()
+        WatchService._snapshot = WatchService._scan()
+        thread = threading.Thread(target=WatchService._run, args=(app,), name='course-watcher', daemon=True)
+        WatchService._thread = thread
+        thread.start()
+
+    @staticmethod
+    def stop():
+        """Stop the background watcher"""
+        WatchService._stop.set()
+        thread = WatchService._thread
+        if thread is not None:
+            thread.join()
+        WatchService._thread = None
+
+    @staticmethod
+    def _run(app):
+        with app.app_context():
+            # Changes since start() are caught up on by the first refresh after winning the lock
+            while CacheService.is_shared() and not hold_file_lock(Config.DATA_FOLDER / Config.WATCH_LOCK_FILENAME):
+                if WatchService._stop.wait(Config.WATCH_POLL_INTERVAL):
+                    return
+
+            inotify = None
+            if sys.platform.startswith('linux'):
+                try:
+                    inotify = _Inotify()
+                except (OSError, AttributeError) as e:
+                    print(f"Error starting inotify, falling back to polling: {e}")
+
+            if inotify is None:
+                WatchService._poll()
+            else:
+                try:
+                    WatchService._watch(inotify)
+                finally:
+                    inotify.close()
+
+    @staticmethod
+    def _poll():
+        """Rescan the whole courses folder every few seconds"""
+        while not WatchService._stop.wait(Config.WATCH_POLL_INTERVAL):
+            try:
+                WatchService._refresh(None)
+            except Exception as e:
+                print(f"Error checking courses for changes: {e}")
+
+    @staticmethod
+    def _watch(inotify: _Inotify):
+        """Rescan only the courses inotify reports events for"""
+        watches: Dict[int, str] = {}
+        WatchService._add_watches(inotify, watches, None)
+        # Catch anything that changed before the watches were in place
+        WatchService._refresh(None)
+
+        while not WatchService._stop.is_set():
+            ready, _, _ = select.select([inotify.fd], [], [], 1.0)
+            if not ready:
+                continue
+            # Let a burst of writes (a git pull, an rsync run) settle into one refresh
+            WatchService._stop.wait(Config.WATCH_DEBOUNCE)
+
+            courses: Optional[Set[str]] = set()
+            events = list(inotify.read_events())
+            while events:
+                for wd, mask, name in events:
+                    if mask & IN_Q_OVERFLOW:
+                        courses = None
+                    elif mask & IN_IGNORED:
+                        watches.pop(wd, None)
+                    elif courses is not None and (watches.get(wd) or name):
+                        # Events on the courses folder itself name the course
+                        courses.add(watches.get(wd) or name)
+                events = list(inotify.read_events())
+
+            try:
+                # Watch new folders before scanning them so no later write is missed
+                WatchService._add_watches(inotify, watches, courses)
+                WatchService._refresh(courses)
+            except Exception as e:
+                print(f"Error checking courses for changes: {e}")
+
+    @staticmethod
+    def _add_watches(inotify: _Inotify, watches: Dict[int, str], courses: Optional[Set[str]]):
+        """Watch the courses folder, and each course folder and docs folder"""
+        root = str(Config.COURSES_FOLDER)
+        if not os.path.isdir(root):
+            return
+        watches[inotify.add_watch(root, WATCH_MASK)] = ''
+        if courses is None:
+            courses = {entry.name for entry in os.scandir(root) if entry.is_dir()}
+        for course_id in courses:
+            for path in (os.path.join(root, course_id), os.path.join(root, course_id, 'docs')):
+                if os.path.isdir(path):
+                    try:
+                        watches[inotify.add_watch(path, WATCH_MASK)] = course_id
+                    except OSError as e:
+                        # The folder can disappear between the check and the watch
+                        print(f"Error watching {path}: {e}")
+
+    @staticmethod
+    def _scan(courses: Optional[Iterable[str]] = None) -> Snapshot:
+        """Stat course.json and docs/*.md of the given courses, or of every course"""
+        snapshot: Snapshot = {}
+        root = Config.COURSES_FOLDER
+        if courses is None:
+            if not root.exists():
+                return snapshot
+            courses = [entry.name for entry in os.scandir(root) if entry.is_dir()]
+
+        for course_id in courses:
+            course_path = os.path.join(root, course_id)
+            if not os.path.isdir(course_path):
+                continue
+            try:
+                stat = os.stat(os.path.join(course_path, 'course.json'))
+                snapshot[('course', course_id, '')] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                snapshot[('course', course_id, '')] = (0, 0)
+
+            docs_path = os.path.join(course_path, 'docs')
+            if os.path.isdir(docs_path):
+                for entry in os.scandir(docs_path):
+                    if entry.name.endswith('.md') and entry.is_file():
+                        stat = entry.stat()
+                        snapshot[('document', course_id, entry.name)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    @staticmethod
+    def _refresh(courses: Optional[Set[str]]):
+        """Rescan courses (None for all) and refresh whatever changed since the last scan"""
+        if courses is not None and not courses:
+            return
+        current = WatchService._scan(courses)
+        previous = WatchService._snapshot
+        if courses is None:
+            old = previous
+        else:
+            old = {key: value for key, value in previous.items() if key[1] in courses}
+
+        changed = {key for key in old.keys() | current.keys() if old.get(key) != current.get(key)}
+        snapshot = {key: value for key, value in previous.items() if key not in old}
+        snapshot.update(current)
+        WatchService._snapshot = snapshot
+
+        for key in sorted(changed):
+            kind, course_id, filename = key
+            if kind == 'course':
+                WatchService._course_changed(course_id, key in current)
+            else:
+                WatchService._document_changed(course_id, filename, key in current)
+
+    @staticmethod
+    def _course_changed(course_id: str, exists: bool):
+        SnapshotService.refresh_course(course_id)
+        CacheService.invalidate_course(course_id)
+        if not exists:
+            SuggestService.remove_course(course_id)
+            return
+
+        title = format_title(course_id)
+        try:
+            with open(Config.COURSES_FOLDER / course_id / 'course.json', 'r') as f:
+                title = json.load(f).get('title') or title
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error reading course info for {course_id}: {e}")
+        SuggestService.update_course(course_id, title)
+
+    @staticmethod
+    def _document_changed(course_id: str, filename: str, exists: bool):
+        SnapshotService.refresh_course(course_id)
+        CacheService.invalidate_document(course_id, filename)
+        if exists:
+            try:
+                content = (Config.COURSES_FOLDER / course_id / 'docs' / filename).read_text(encoding='utf-8')
+                IndexService.update_document(course_id, filename, content)
+                SuggestService.update_document(course_id, filename, content)
+                WarmService.warm_document(course_id, filename)
+                return
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Error refreshing document {course_id}/{filename}: {e}")
+                return
+        IndexService.remove_document(course_id, filename)
+        SuggestService.remove_document(course_id, filename)
+        RenderService.invalidate(course_id, filename)
\ No newline at end of file
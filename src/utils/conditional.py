@@ -0,0 +1,41 @@
+import hashlib
+import os
+from typing import Optional
+from flask import request, make_response
+from werkzeug.http import is_resource_modified
+from ..config.settings import Config
+
+_template_version: Optional[str] = None
+
+def template_version() -> str:
+    """Digest of the template files, so a deploy that changes them changes every page ETag"""
+    global _template_version
+    if _template_version is None:
+        stats = []
+        for root, _, files in os.walk(Config.TEMPLATES_FOLDER):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                stats.append((os.path.relpath(os.path.join(root, name), Config.TEMPLATES_FOLDER),
+                              stat.st_mtime_ns, stat.st_size))
+        _template_version = hashlib.sha256(repr(sorted(stats)).encode('utf-8')).hexdigest()[:16]
+    return _template_version
+
+def page_etag(*parts) -> str:
+    """Build a strong ETag from everything a page's HTML depends on"""
+    return hashlib.sha256(repr((template_version(), parts)).encode('utf-8')).hexdigest()
+
+def not_modified(etag: str, vary_cookie: bool = False):
+    """Get a 304 response when the request already holds etag, otherwise None"""
+    if is_resource_modified(request.environ, etag=etag):
+        return None
+    return add_validators(make_response('', 304), etag, vary_cookie)
+
+def add_validators(response, etag: str, vary_cookie: bool = False):
+    """Add the ETag and revalidation headers to a page response"""
+    response.set_etag(etag)
+    # Pages may carry cookies, so only the browser keeps them, and it checks back every time
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    if vary_cookie:
+        response.vary.add('Cookie')
+    return response
\ No newline at end of file
@@ -2,11 +2,27 @@ import os
 import json
 import uuid
 import re
-from typing import Dict, Any, List
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple
+from markdown.extensions.toc import slugify, unique
 from werkzeug.utils import secure_filename
 from pathlib import Path
 from ..config.settings import Config
 
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# Underscores split terms so that _emphasis_ and snake_case index their words
+TOKEN_RE = re.compile(r'[^\W_]+')
+FENCE_RE = re.compile(r'^[ ]{0,3}(`{3,}|~{3,})')
+ATX_HEADING_RE = re.compile(r'^#{1,6}(.*?)#*$')
+SETEXT_UNDERLINE_RE = re.compile(r'^(=+|-+)[ \t]*$')
+HEADING_ATTRS_RE = re.compile(r'\s*\{:?([^}]*)\}\s*$')
+HEADING_MARKUP_RE = re.compile(r'!?\[([^\]]*)\]\([^)]*\)|<[^>]+>|[`*]')
+
 def format_title(text: str) -> str:
     """Format text as a title by replacing underscores/hyphens with spaces and capitalizing words"""
     if not text:
@@ -24,6 +40,59 @@ def extract_title_from_markdown(content: str, filename: str) -> str:
         name_without_ext = os.path.splitext(filename)[0]
         return format_title(name_without_ext)
 
+def tokenize(text: str) -> List[Tuple[str, int]]:
+    """Split text into lowercase word terms paired with their character offsets"""
+    return [(match.group().lower(), match.start()) for match in TOKEN_RE.finditer(text)]
+
+def _heading_text_and_id(raw: str) -> Tuple[str, str]:
+    """Strip inline markup from a heading, returning its text and any {#id} attribute"""
+    custom_id = ''
+    attrs = HEADING_ATTRS_RE.search(raw)
+    if attrs:
+        raw = raw[:attrs.start()]
+        for attr in attrs.group(1).split():
+            if attr.startswith('#'):
+                custom_id = attr[1:]
+    text = HEADING_MARKUP_RE.sub(lambda m: m.group(1) or '', raw)
+    return text.strip(), custom_id
+
+def split_markdown_sections(content: str) -> List[Tuple[int, str, str]]:
+    """Split markdown into sections at its headings.
+    
+    Returns (character offset, anchor, heading) for each section, with
+    anchors assigned the same way the toc extension assigns heading ids.
+    Text before the first heading forms a section with an empty anchor.
+    """
+    headings = []
+    fence = None
+    previous = None
+    offset = 0
+    for line in content.splitlines(keepends=True):
+        stripped = line.rstrip('\r\n')
+        fence_match = FENCE_RE.match(stripped)
+        if fence is not None:
+            if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence):
+                fence = None
+        elif fence_match:
+            fence = fence_match.group(1)
+        elif ATX_HEADING_RE.match(stripped):
+            headings.append((offset, _heading_text_and_id(ATX_HEADING_RE.match(stripped).group(1))))
+        elif (previous is not None and previous[1].strip() and not previous[1].startswith(('#', ' ', '\t'))
+              and SETEXT_UNDERLINE_RE.match(stripped)):
+            headings.append((previous[0], _heading_text_and_id(previous[1])))
+        previous = (offset, stripped) if fence is None else None
+        offset += len(line)
+    
+    # Explicit ids are reserved before generated ones, as in the toc extension
+    used_ids = {custom_id for _, (_, custom_id) in headings if custom_id}
+    sections = []
+    if not headings or headings[0][0] > 0:
+        sections.append((0, '', ''))
+    for heading_offset, (text, custom_id) in headings:
+        anchor = custom_id or unique(slugify(text, '-'), used_ids)
+        sections.append((heading_offset, anchor, text))
+    return sections
+
 def allowed_file(filename: str) -> bool:
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
@@ -37,3 +106,81 @@ def generate_unique_filename(filename: str) -> str:
 def sanitize_path(path_segment: str) -> bool:
     """Check if path segment is safe (no directory traversal)"""
     return '..' not in path_segment and not path_segment.startswith('/')
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False, blocking: bool = True):
+    """Hold an flock on path for the block, yielding whether it was acquired.
+
+    A non-blocking request yields False instead of waiting when another
+    process holds a conflicting lock. Without fcntl (Windows) there is
+    only one worker process, so the lock is always acquired.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as lock_file:
+        if fcntl is None:
+            yield True
+            return
+        operation = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB)
+        try:
+            fcntl.flock(lock_file.fileno(), operation)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+_held_locks: Dict[str, Tuple[int, Any]] = {}
+_held_locks_lock = threading.Lock()
+
+def hold_file_lock(path: Path) -> bool:
+    """Take an exclusive flock on path for the rest of the process's life, returning whether this process holds it.
+
+    Elects one worker per host for a background job; the lock passes to
+    another worker only when the holder exits.
+    """
+    if fcntl is None:
+        return True
+    with _held_locks_lock:
+        held = _held_locks.get(str(path))
+        if held is not None and held[0] == os.getpid():
+            return True
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(path, 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        _held_locks[str(path)] = (os.getpid(), lock_file)
+        return True
+
+@contextmanager
+def atomic_write(path: Path, mode: str = 'w', fsync: bool = False, overwrite: bool = True):
+    """Write path through a temp file that takes its place once the block completes.
+
+    Readers see the old file or the new one, never a partial write. The
+    temp name is unique per process and thread. With overwrite=False the
+    temp file is linked into place, raising FileExistsError if path exists.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with open(temp_path, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if overwrite:
+            os.replace(temp_path, path)
+        else:
+            os.link(temp_path, path)
+    finally:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
\ No newline at end of file
@@ -0,0 +1,44 @@
+import hashlib
+import sys
+import threading
+from markdown.extensions import codehilite, fenced_code
+from markdown.extensions.codehilite import CodeHilite
+from .lru_cache import LRUCache
+
+class CachedCodeHilite(CodeHilite):
+    """CodeHilite that reuses the highlighted HTML of identical code blocks.
+
+    Blocks are keyed by a hash of their source, language and every
+    highlighting option, so a listing repeated across documents, or left
+    untouched when the rest of its page is edited, is highlighted once.
+    """
+
+    cache = LRUCache(2000, sizeof=sys.getsizeof)
+
+    def cache_key(self, shebang: bool) -> str:
+        """Hash of everything that affects the highlighted output"""
+        key = repr((self.src, self.lang, self.guess_lang, self.use_pygments, self.lang_prefix,
+                    self.pygments_formatter, sorted(self.options.items()), shebang))
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def hilite(self, shebang: bool = True) -> str:
+        key = self.cache_key(shebang)
+        html = self.cache.get(key)
+        if html is None:
+            html = super().hilite(shebang)
+            self.cache.put(key, html)
+        return html
+
+_install_lock = threading.Lock()
+
+def install_highlight_cache(max_blocks: int):
+    """Route fenced and indented code highlighting through CachedCodeHilite.
+
+    Both extensions look CodeHilite up in their own module when they
+    highlight a block, so it is swapped there for every converter.
+    """
+    with _install_lock:
+        if fenced_code.CodeHilite is not CachedCodeHilite:
+            CachedCodeHilite.cache = LRUCache(max_blocks, sizeof=sys.getsizeof)
+            fenced_code.CodeHilite = CachedCodeHilite
+            codehilite.CodeHilite = CachedCodeHilite
\ No newline at end of file
@@ -0,0 +1,189 @@
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from .helpers import atomic_write, file_lock
+
+class LikeJournal:
+    """Counters held in memory, with every change appended to a journal shared by all workers.
+
+    The snapshot file holds the counts as of a journal epoch, and the
+    deltas since then are appended to that epoch's journal. Every process
+    replays the journal from the offset it last read, so a change costs
+    one short append instead of rewriting every count. Appends hold a
+    shared file lock and compaction an exclusive one: compaction folds the
+    journal into a new snapshot and starts the next epoch's journal.
+
+    Compaction also appends an empty line to the journal it retires, so
+    any change at all grows the journal a process has open: while its
+    size is unchanged, reads cost one fstat and parse nothing.
+    """
+
+    def __init__(self, snapshot_path: Path, fsync_interval: float = 1.0, sync_interval: float = 1.0,
+                 compact_interval: float = 300.0, compact_bytes: int = 1024 * 1024):
+        self.snapshot_path = Path(snapshot_path)
+        self.lock_path = self.snapshot_path.with_suffix('.lock')
+        self.fsync_interval = fsync_interval
+        self.sync_interval = sync_interval
+        self.compact_interval = compact_interval
+        self.compact_bytes = compact_bytes
+
+        self._counts: Dict[str, int] = {}
+        self._snapshot_id: Optional[Tuple[int, int, int]] = None
+        self._epoch = 0
+        self._journal_fd: Optional[int] = None
+        self._offset = 0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._last_sync = float('-inf')
+        self._last_compact = time.monotonic()
+        self._dirty = False
+        self._flusher: Optional[threading.Thread] = None
+
+    def get(self, key: str) -> int:
+        """Get a counter, catching up with other workers at most every sync_interval"""
+        with self._lock:
+            self._catch_up()
+            return self._counts.get(key, 0)
+
+    def counts(self) -> Dict[str, int]:
+        """Get every counter"""
+        with self._lock:
+            self._catch_up()
+            return dict(self._counts)
+
+    def add(self, key: str, delta: int) -> int:
+        """Add delta to a counter, which never drops below zero, and return its new value"""
+        line = (json.dumps([key, delta]) + '\n').encode('utf-8')
+        with self._lock:
+            self._check_process()
+            with file_lock(self.lock_path, shared=True):
+                self._sync()
+                if delta < 0 and self._counts.get(key, 0) <= 0:
+                    return 0
+                os.write(self._journal_fd, line)
+                # Replays this change along with any another worker appended meanwhile
+                self._sync()
+            self._dirty = True
+            self._start_flusher()
+            return self._counts.get(key, 0)
+
+    def flush(self):
+        """Fsync the appends made since the last flush, compacting the journal when due"""
+        with self._lock:
+            self._check_process()
+            if self._dirty and self._journal_fd is not None:
+                os.fsync(self._journal_fd)
+                self._dirty = False
+            if self._offset and (self._offset >= self.compact_bytes
+                                 or time.monotonic() - self._last_compact >= self.compact_interval):
+                self._compact()
+
+    def _catch_up(self):
+        self._check_process()
+        if time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        if self._journal_fd is not None and os.fstat(self._journal_fd).st_size == self._offset:
+            self._last_sync = time.monotonic()
+            return
+        with file_lock(self.lock_path, shared=True):
+            self._sync()
+
+    def _check_process(self):
+        """Drop state inherited through fork, so the child opens its own journal and flusher"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._journal_fd = None
+            self._snapshot_id = None
+            self._flusher = None
+            self._dirty = False
+
+    def _journal_path(self, epoch: int) -> Path:
+        return self.snapshot_path.with_name(f'{self.snapshot_path.stem}.{epoch}.journal')
+
+    def _sync(self):
+        """Catch up with the snapshot and journal; the caller holds the file lock"""
+        try:
+            stat = os.stat(self.snapshot_path)
+            snapshot_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            snapshot_id = None
+        if snapshot_id != self._snapshot_id or self._journal_fd is None:
+            self._counts, self._epoch = self._load_snapshot()
+            self._snapshot_id = snapshot_id
+            if self._journal_fd is not None:
+                os.close(self._journal_fd)
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal_fd = os.open(self._journal_path(self._epoch), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            self._offset = 0
+
+        size = os.fstat(self._journal_fd).st_size
+        if size > self._offset:
+            os.lseek(self._journal_fd, self._offset, os.SEEK_SET)
+            data = os.read(self._journal_fd, size - self._offset)
+            # A line still being written is picked up on the next sync
+            end = data.rfind(b'\n') + 1
+            for line in data[:end].splitlines():
+                if not line:
+                    # Marks a journal retired by compaction
+                    continue
+                try:
+                    key, delta = json.loads(line)
+                except ValueError:
+                    # Torn by a crash mid-append
+                    continue
+                self._counts[key] = max(0, self._counts.get(key, 0) + delta)
+            self._offset += end
+        self._last_sync = time.monotonic()
+
+    def _load_snapshot(self) -> Tuple[Dict[str, int], int]:
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}, 0
+        except Exception as e:
+            print(f"Error loading likes snapshot: {e}")
+            return {}, 0
+        if isinstance(data.get('likes'), dict):
+            return dict(data['likes']), data.get('epoch', 0)
+        # Plain {key: count} files written before the journal existed
+        return dict(data), 0
+
+    def _compact(self):
+        """Fold the journal into a new snapshot; the caller holds the thread lock"""
+        self._last_compact = time.monotonic()
+        with file_lock(self.lock_path, blocking=False) as locked:
+            if not locked:
+                # Another process is compacting
+                return
+            try:
+                self._sync()
+                # Tell processes still reading this journal to look for the new snapshot
+                os.write(self._journal_fd, b'\n')
+                # Replacing the snapshot commits the compaction; the old journal is now unused
+                with atomic_write(self.snapshot_path, fsync=True) as f:
+                    json.dump({'epoch': self._epoch + 1, 'likes': self._counts}, f, indent=2)
+                self._sync()
+                for path in self.snapshot_path.parent.glob(f'{self.snapshot_path.stem}.*.journal'):
+                    if path != self._journal_path(self._epoch):
+                        path.unlink()
+            except Exception as e:
+                print(f"Error compacting likes journal: {e}")
+
+    def _start_flusher(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name='like-journal', daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.fsync_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing likes journal: {e}")
\ No newline at end of file
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+from .like_journal import LikeJournal
+
+class SQLiteLikeStore:
+    """Counters in a SQLite database in WAL mode, shared by every worker process.
+
+    Each change is a single upsert that increments the stored count, so
+    concurrent workers never lose one, and WAL lets readers carry on while
+    a change is written. Every thread keeps its own connection. Counts
+    from the JSON likes file and its journal are imported on first use.
+
+    Each connection caches the counts it read and keeps them until
+    PRAGMA data_version shows another connection has committed a change.
+    """
+
+    def __init__(self, db_path: Path, legacy_path: Optional[Path] = None, busy_timeout: float = 5.0):
+        self.db_path = Path(db_path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+    def get(self, key: str) -> int:
+        """Get a counter"""
+        return self._cached_counts().get(key, 0)
+
+    def counts(self) -> Dict[str, int]:
+        """Get every counter"""
+        return dict(self._cached_counts())
+
+    def add(self, key: str, delta: int) -> int:
+        """Add delta to a counter, which never drops below zero, and return its new value"""
+        connection = self._connection()
+        with self._transaction(connection):
+            connection.execute(
+                'INSERT INTO likes (key, count) VALUES (:key, max(0, :delta)) '
+                'ON CONFLICT (key) DO UPDATE SET count = max(0, count + :delta)',
+                {'key': key, 'delta': delta}
+            )
+            count = connection.execute('SELECT count FROM likes WHERE key = ?', (key,)).fetchone()[0]
+        # data_version ignores this connection's own commits
+        self._local.counts = None
+        return count
+
+    def flush(self):
+        """Nothing to flush: every change is committed as it is made"""
+
+    def _cached_counts(self) -> Dict[str, int]:
+        connection = self._connection()
+        data_version = connection.execute('PRAGMA data_version').fetchone()[0]
+        if self._local.counts is None or self._local.data_version != data_version:
+            self._local.counts = dict(connection.execute('SELECT key, count FROM likes'))
+            self._local.data_version = data_version
+        return self._local.counts
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        # A connection inherited through fork must not be used by the child
+        if connection is None or self._local.pid != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.db_path), timeout=self.busy_timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            self._create_schema(connection)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            self._local.counts = None
+            self._local.data_version = None
+        return connection
+
+    @staticmethod
+    @contextmanager
+    def _transaction(connection: sqlite3.Connection):
+        # Take the write lock up front, so the read that follows a write sees it
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _create_schema(self, connection: sqlite3.Connection):
+        with self._transaction(connection):
+            connection.execute('CREATE TABLE IF NOT EXISTS likes (key TEXT PRIMARY KEY, count INTEGER NOT NULL)')
+            connection.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+            migrated = connection.execute("SELECT 1 FROM meta WHERE name = 'migrated'").fetchone()
+            if not migrated:
+                if self.legacy_path is not None and self._has_legacy_counts():
+                    counts = LikeJournal(self.legacy_path).counts()
+                    connection.executemany('INSERT OR REPLACE INTO likes (key, count) VALUES (?, ?)',
+                                           [(key, int(count)) for key, count in counts.items()])
+                connection.execute("INSERT INTO meta (name, value) VALUES ('migrated', '1')")
+
+    def _has_legacy_counts(self) -> bool:
+        # Likes made before the journal was first compacted are only in its journal
+        return self.legacy_path.exists() or any(
+            self.legacy_path.parent.glob(f'{self.legacy_path.stem}.*.journal'))
\ No newline at end of file
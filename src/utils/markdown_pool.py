@@ -0,0 +1,63 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import markdown
+
+class MarkdownPool:
+    """Thread-safe pool of pre-built markdown converters for one extension profile.
+
+    Building a Markdown instance imports and registers every extension,
+    which can cost more than converting a document. Converters are built
+    once, handed to one thread at a time and reset() before reuse.
+
+    Some extensions register processors while converting (abbr adds an
+    inline pattern per abbreviation), which reset() leaves in place, so
+    anything registered after construction is removed as well.
+    """
+
+    def __init__(self, extensions: List[str], extension_configs: Optional[Dict[str, Dict]] = None,
+                 max_idle: int = 8):
+        self.extensions = list(extensions)
+        self.extension_configs = dict(extension_configs or {})
+        self.max_idle = max_idle
+        self._idle: List[markdown.Markdown] = []
+        self._lock = threading.Lock()
+        self._baseline: Optional[List[Set[str]]] = None
+
+    @staticmethod
+    def _registries(md: markdown.Markdown) -> list:
+        return [md.preprocessors, md.parser.blockprocessors, md.inlinePatterns,
+                md.treeprocessors, md.postprocessors]
+
+    def _create(self) -> markdown.Markdown:
+        md = markdown.Markdown(extensions=self.extensions, extension_configs=self.extension_configs)
+        if self._baseline is None:
+            self._baseline = [set(registry._data) for registry in self._registries(md)]
+        return md
+
+    def _reset(self, md: markdown.Markdown):
+        md.reset()
+        for registry, names in zip(self._registries(md), self._baseline):
+            for name in [name for name in registry._data if name not in names]:
+                registry.deregister(name)
+
+    @contextmanager
+    def converter(self) -> Iterator[markdown.Markdown]:
+        """Borrow a converter, building a new one when none is idle"""
+        with self._lock:
+            md = self._idle.pop() if self._idle else None
+        if md is None:
+            md = self._create()
+
+        # A conversion that raises may leave extension state behind, so its converter is dropped
+        yield md
+        self._reset(md)
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(md)
+
+    def convert(self, text: str) -> Tuple[str, str]:
+        """Convert markdown to (html, toc)"""
+        with self.converter() as md:
+            html_content = md.convert(text)
+            return html_content, getattr(md, 'toc', '')
\ No newline at end of file
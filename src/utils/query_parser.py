@@ -0,0 +1,26 @@
+import re
+from ..models.search_models import ParsedQuery
+from .helpers import tokenize
+
+QUERY_PART_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+def parse_query(query: str) -> ParsedQuery:
+    """Parse a search query into literal terms and "quoted phrases".
+    
+    A query wrapped in slashes (/pattern/) is an explicit pattern search.
+    Words that split into several terms (e.g. node.js) are kept as phrases.
+    """
+    query = query.strip()
+    if len(query) > 2 and query.startswith('/') and query.endswith('/'):
+        return ParsedQuery(pattern=query[1:-1])
+    
+    parsed = ParsedQuery()
+    for match in QUERY_PART_RE.finditer(query):
+        terms = [term for term, _ in tokenize(match.group(1) if match.group(1) is not None else match.group(2))]
+        if len(terms) == 1:
+            parsed.terms.append(terms[0])
+        elif terms:
+            parsed.phrases.append(terms)
+    
+    parsed.terms = list(dict.fromkeys(parsed.terms))
+    return parsed
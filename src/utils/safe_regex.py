@@ -0,0 +1,428 @@
+import re
+from typing import List, Optional, Set, Tuple
+
+class RegexError(ValueError):
+    """Raised when a search pattern is invalid or unsupported"""
+
+class RegexBudgetExceeded(RuntimeError):
+    """Raised when a pattern search runs out of steps"""
+
+class StepBudget:
+    """Step allowance shared by every search run for one query"""
+
+    def __init__(self, steps: int):
+        self.remaining = steps
+
+    def spend(self, steps: int):
+        """Consume steps, raising once the allowance is exhausted"""
+        self.remaining -= steps
+        if self.remaining < 0:
+            raise RegexBudgetExceeded('Pattern search exceeded its step budget')
+
+# Instruction opcodes
+CHAR, ANY, CLASS, SPLIT, JMP, ASSERT, MATCH = range(7)
+
+MAX_PROGRAM_SIZE = 5000
+MAX_REPEAT = 100
+# Alternatives tracked per literal before only their required parts are kept
+MAX_EXACT = 16
+
+BRACE_RE = re.compile(r'\{(\d+)(,(\d*))?\}')
+
+def _is_word(ch: Optional[str]) -> bool:
+    return ch is not None and (ch.isalnum() or ch == '_')
+
+CLASS_ESCAPES = {
+    'd': str.isdigit,
+    'D': lambda ch: not ch.isdigit(),
+    'w': _is_word,
+    'W': lambda ch: not _is_word(ch),
+    's': str.isspace,
+    'S': lambda ch: not ch.isspace(),
+}
+
+CHAR_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+
+class _Parser:
+    """Recursive descent parser for the supported pattern syntax"""
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.pos = 0
+
+    def parse(self):
+        node = self._alternation()
+        if self.pos != len(self.pattern):
+            raise RegexError(f"Unbalanced ')' at position {self.pos}")
+        return node
+
+    def _peek(self) -> Optional[str]:
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def _next(self) -> str:
+        ch = self._peek()
+        if ch is None:
+            raise RegexError('Unexpected end of pattern')
+        self.pos += 1
+        return ch
+
+    def _alternation(self):
+        branches = [self._concatenation()]
+        while self._peek() == '|':
+            self.pos += 1
+            branches.append(self._concatenation())
+        return ('alt', branches) if len(branches) > 1 else branches[0]
+
+    def _concatenation(self):
+        items = []
+        while self._peek() not in (None, '|', ')'):
+            items.append(self._repetition())
+        return ('cat', items)
+
+    def _repetition(self):
+        node = self._atom()
+        while True:
+            ch = self._peek()
+            if ch in ('*', '+', '?'):
+                self.pos += 1
+                low, high = {'*': (0, None), '+': (1, None), '?': (0, 1)}[ch]
+            elif ch == '{' and BRACE_RE.match(self.pattern, self.pos):
+                match = BRACE_RE.match(self.pattern, self.pos)
+                self.pos = match.end()
+                low = int(match.group(1))
+                if match.group(2) is None:
+                    high = low
+                else:
+                    high = int(match.group(3)) if match.group(3) else None
+                if low > MAX_REPEAT or (high is not None and (high > MAX_REPEAT or high < low)):
+                    raise RegexError(f'Repeat counts must be ordered and at most {MAX_REPEAT}')
+            else:
+                return node
+            # Lazy modifiers are accepted; only the match position is reported
+            if self._peek() == '?':
+                self.pos += 1
+            node = ('rep', node, low, high)
+
+    def _atom(self):
+        ch = self._next()
+        if ch == '(':
+            if self.pattern.startswith('?:', self.pos):
+                self.pos += 2
+            node = self._alternation()
+            if self._peek() != ')':
+                raise RegexError("Missing ')'")
+            self.pos += 1
+            return node
+        if ch == '.':
+            return ('any',)
+        if ch == '^':
+            return ('assert', 'bol')
+        if ch == '$':
+            return ('assert', 'eol')
+        if ch == '[':
+            return self._char_class()
+        if ch == '\\':
+            return self._escape()
+        if ch in '*+?':
+            raise RegexError(f'Nothing to repeat at position {self.pos - 1}')
+        return ('char', ch.lower())
+
+    def _escape(self):
+        ch = self._next()
+        if ch in CLASS_ESCAPES:
+            return ('class', [CLASS_ESCAPES[ch]], False)
+        if ch == 'b':
+            return ('assert', 'word')
+        if ch == 'B':
+            return ('assert', 'nonword')
+        if ch in CHAR_ESCAPES:
+            return ('char', CHAR_ESCAPES[ch])
+        if ch.isalnum():
+            raise RegexError(f'Unsupported escape \\{ch}')
+        return ('char', ch.lower())
+
+    def _class_char(self) -> str:
+        ch = self._next()
+        if ch == '\\':
+            escaped = self._next()
+            return CHAR_ESCAPES.get(escaped, escaped)
+        return ch
+
+    def _char_class(self):
+        negated = False
+        if self._peek() == '^':
+            negated = True
+            self.pos += 1
+
+        items = []
+        first = True
+        while True:
+            ch = self._peek()
+            if ch is None:
+                raise RegexError("Missing ']'")
+            if ch == ']' and not first:
+                self.pos += 1
+                break
+            first = False
+
+            if ch == '\\' and self.pattern[self.pos + 1:self.pos + 2] in CLASS_ESCAPES:
+                items.append(CLASS_ESCAPES[self.pattern[self.pos + 1]])
+                self.pos += 2
+                continue
+
+            low = self._class_char()
+            if self._peek() == '-' and self.pattern[self.pos + 1:self.pos + 2] not in ('', ']'):
+                self.pos += 1
+                high = self._class_char()
+                if high < low:
+                    raise RegexError(f'Bad character range {low}-{high}')
+                items.append((low, high))
+            else:
+                items.append((low, low))
+
+        return ('class', items, negated)
+
+def _product(prefixes: Set[str], suffixes: Set[str]) -> Set[str]:
+    return {prefix + suffix for prefix in prefixes for suffix in suffixes}
+
+def _literals(node) -> Tuple[Optional[Set[str]], List[Set[str]]]:
+    """Work out which strings a match of node must contain.
+
+    Returns the exact set of strings node can match when it is small, and
+    clauses of which every match contains at least one string each.
+    """
+    kind = node[0]
+    if kind == 'char':
+        return {node[1]}, []
+    if kind == 'assert':
+        return {''}, []
+    if kind in ('any', 'class'):
+        return None, []
+
+    if kind == 'cat':
+        current: Optional[Set[str]] = {''}
+        clauses: List[Set[str]] = []
+        for item in node[1]:
+            exact, required = _literals(item)
+            clauses.extend(required)
+            if exact is not None and current is not None and len(current) * len(exact) <= MAX_EXACT:
+                current = _product(current, exact)
+                continue
+            if current is not None:
+                clauses.append(current)
+            current = exact
+        return current, clauses
+
+    if kind == 'alt':
+        analyzed = [_literals(branch) for branch in node[1]]
+        if all(exact is not None for exact, _ in analyzed):
+            union = set().union(*(exact for exact, _ in analyzed))
+            if len(union) <= MAX_EXACT:
+                return union, []
+        # One clause from every branch makes a clause for the whole
+        clause: Set[str] = set()
+        for exact, required in analyzed:
+            options = required + ([exact] if exact is not None else [])
+            options = [option for option in options if '' not in option]
+            if not options:
+                return None, []
+            clause.update(max(options, key=lambda option: min(map(len, option))))
+        return None, [clause]
+
+    _, atom, low, high = node
+    exact, required = _literals(atom)
+    if exact is not None and high is not None and len(exact) ** high <= MAX_EXACT:
+        repeated, current = set(), {''}
+        for count in range(high + 1):
+            if count >= low:
+                repeated.update(current)
+            current = _product(current, exact)
+        if len(repeated) <= MAX_EXACT:
+            return repeated, []
+    if low == 0:
+        return None, []
+    return None, required + ([exact] if exact is not None else [])
+
+def _prefix(node) -> str:
+    """Get the literal text every match of node starts with"""
+    items = node[1] if node[0] == 'cat' else [node]
+    prefix = ''
+    for item in items:
+        if item[0] == 'char':
+            prefix += item[1]
+        elif item[0] != 'assert':
+            break
+    return prefix
+
+class SafeRegex:
+    """Case-insensitive pattern matcher that runs in linear time.
+
+    Patterns are compiled to a Thompson NFA and simulated breadth-first
+    (Pike VM), so there is no backtracking. Every thread step is charged
+    to a StepBudget, which bounds the work a single query can cause.
+    Supports literals, '.', classes, \\d \\w \\s, groups, '|', '*', '+',
+    '?', {m,n}, '^', '$' and \\b.
+
+    The literal text a pattern requires is worked out when it is
+    compiled: texts lacking it are rejected without running the VM, and
+    the VM skips ahead to each place a match could start.
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.program: List[tuple] = []
+        tree = _Parser(pattern).parse()
+        self._compile(tree)
+        self.program.append((MATCH,))
+
+        exact, clauses = _literals(tree)
+        if exact is not None:
+            clauses.append(exact)
+        # Each clause lists strings of which every match contains one
+        self.literals: List[Set[str]] = [clause for clause in clauses if '' not in clause]
+        self.prefix = _prefix(tree)
+
+    def _emit(self, instruction) -> int:
+        if len(self.program) >= MAX_PROGRAM_SIZE:
+            raise RegexError('Pattern is too complex')
+        self.program.append(instruction)
+        return len(self.program) - 1
+
+    def _compile(self, node):
+        kind = node[0]
+        if kind == 'char':
+            self._emit((CHAR, node[1]))
+        elif kind == 'any':
+            self._emit((ANY,))
+        elif kind == 'class':
+            self._emit((CLASS, node[1], node[2]))
+        elif kind == 'assert':
+            self._emit((ASSERT, node[1]))
+        elif kind == 'cat':
+            for item in node[1]:
+                self._compile(item)
+        elif kind == 'alt':
+            jumps = []
+            for branch in node[1][:-1]:
+                split = self._emit(None)
+                self._compile(branch)
+                jumps.append(self._emit(None))
+                self.program[split] = (SPLIT, split + 1, len(self.program))
+            self._compile(node[1][-1])
+            for jump in jumps:
+                self.program[jump] = (JMP, len(self.program))
+        elif kind == 'rep':
+            _, atom, low, high = node
+            for _ in range(low):
+                self._compile(atom)
+            if high is None:
+                loop = self._emit(None)
+                self._compile(atom)
+                self._emit((JMP, loop))
+                self.program[loop] = (SPLIT, loop + 1, len(self.program))
+            else:
+                splits = []
+                for _ in range(high - low):
+                    splits.append(self._emit(None))
+                    self._compile(atom)
+                for split in splits:
+                    self.program[split] = (SPLIT, split + 1, len(self.program))
+
+    @staticmethod
+    def _assert(kind: str, text: str, pos: int) -> bool:
+        before = text[pos - 1] if pos > 0 else None
+        after = text[pos] if pos < len(text) else None
+        if kind == 'bol':
+            return before is None or before == '\n'
+        if kind == 'eol':
+            return after is None or after == '\n'
+        if kind == 'word':
+            return _is_word(before) != _is_word(after)
+        return _is_word(before) == _is_word(after)
+
+    @staticmethod
+    def _matches(instruction, ch: str) -> bool:
+        op = instruction[0]
+        if op == CHAR:
+            return instruction[1] == ch
+        if op == ANY:
+            return ch != '\n'
+        if op == CLASS:
+            found = False
+            for candidate in (ch, ch.upper()):
+                for item in instruction[1]:
+                    if item[0] <= candidate <= item[1] if isinstance(item, tuple) else item(candidate):
+                        found = True
+                        break
+                if found:
+                    break
+            return found != instruction[2]
+        return False
+
+    def _add_thread(self, threads: List[Tuple[int, int]], seen: Set[int], pc: int,
+                    start: int, text: str, pos: int) -> int:
+        """Follow epsilon transitions from pc, queueing threads in priority order"""
+        visited = 0
+        stack = [pc]
+        while stack:
+            pc = stack.pop()
+            if pc in seen:
+                continue
+            seen.add(pc)
+            visited += 1
+            instruction = self.program[pc]
+            op = instruction[0]
+            if op == JMP:
+                stack.append(instruction[1])
+            elif op == SPLIT:
+                stack.append(instruction[2])
+                stack.append(instruction[1])
+            elif op == ASSERT:
+                if self._assert(instruction[1], text, pos):
+                    stack.append(pc + 1)
+            else:
+                threads.append((pc, start))
+        return visited
+
+    def search(self, text: str, budget: StepBudget) -> Optional[Tuple[int, int]]:
+        """Find the leftmost match in text, returning its (start, end) span"""
+        text = text.lower()
+        if not all(any(literal in text for literal in clause) for clause in self.literals):
+            return None
+        match = None
+        threads: List[Tuple[int, int]] = []
+        seen: Set[int] = set()
+
+        pos = 0
+        while pos <= len(text):
+            if match is None and not threads and self.prefix:
+                # No match can start before the next occurrence of the prefix
+                next_pos = text.find(self.prefix, pos)
+                if next_pos < 0:
+                    break
+                if next_pos > pos:
+                    pos, seen = next_pos, set()
+            steps = 0
+            if match is None:
+                steps += self._add_thread(threads, seen, 0, pos, text, pos)
+            elif not threads:
+                break
+
+            ch = text[pos] if pos < len(text) else None
+            next_threads: List[Tuple[int, int]] = []
+            next_seen: Set[int] = set()
+            for pc, start in threads:
+                steps += 1
+                instruction = self.program[pc]
+                if instruction[0] == MATCH:
+                    # Lower priority threads can no longer win
+                    match = (start, pos)
+                    break
+                if ch is not None and self._matches(instruction, ch):
+                    steps += self._add_thread(next_threads, next_seen, pc + 1, start, text, pos + 1)
+
+            budget.spend(steps)
+            threads, seen = next_threads, next_seen
+            pos += 1
+
+        return match
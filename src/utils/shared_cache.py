@@ -0,0 +1,201 @@
+import hashlib
+import os
+import pickle
+import struct
+import threading
+import time
+from typing import Any, Optional
+from flask_caching.backends.base import BaseCache
+from .helpers import atomic_write, file_lock
+
+# Entry file layout: expiry time (0 for never), key length, key, pickled value
+ENTRY_HEADER = struct.Struct('<dI')
+LOCK_FILENAME = '.prune.lock'
+
+class SharedFileCache(BaseCache):
+    """Cache stored as files in one directory, shared by every worker process on a host.
+
+    Entries are written to a temporary file and renamed into place, so
+    readers never see partial values. Every read refreshes the entry's
+    mtime (at most once per touch_interval), which makes mtime the
+    last-use time: once the files exceed max_bytes, the least recently
+    used entries are deleted until the cache is back under low_water of
+    that limit. Only one process prunes at a time.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024,
+                 max_entry_bytes: int = 8 * 1024 * 1024, default_timeout: int = 300,
+                 low_water: float = 0.9, touch_interval: float = 1.0):
+        super().__init__(default_timeout=default_timeout)
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.low_water = low_water
+        self.touch_interval = touch_interval
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Bytes written by this process since the directory was last measured
+        self._written = 0
+        self._size_estimate = self._measure()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(
+            max_bytes=config.get('CACHE_MAX_BYTES', 256 * 1024 * 1024),
+            max_entry_bytes=config.get('CACHE_MAX_ENTRY_BYTES', 8 * 1024 * 1024)
+        )
+        return cls(config['CACHE_DIR'], *args, **kwargs)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def _expires(self, timeout: Optional[int]) -> float:
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout else 0.0
+
+    def _read(self, key: str, touch: bool = True) -> Optional[tuple]:
+        """Read an entry, returning (value,) or None when missing or expired"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Error reading cache entry {path}: {e}")
+            return None
+
+        try:
+            expires, key_length = ENTRY_HEADER.unpack_from(data, 0)
+            stored_key = data[ENTRY_HEADER.size:ENTRY_HEADER.size + key_length].decode('utf-8')
+            if stored_key != key:
+                return None
+            if expires and expires < time.time():
+                self._remove(path)
+                return None
+            value = pickle.loads(data[ENTRY_HEADER.size + key_length:])
+        except Exception as e:
+            print(f"Error decoding cache entry {path}: {e}")
+            self._remove(path)
+            return None
+
+        if touch and time.time() - mtime > self.touch_interval:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return (value,)
+
+    def _write(self, key: str, value: Any, timeout: Optional[int], overwrite: bool) -> bool:
+        encoded_key = key.encode('utf-8')
+        try:
+            payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"Error pickling cache entry {key}: {e}")
+            return False
+        data = ENTRY_HEADER.pack(self._expires(timeout), len(encoded_key)) + encoded_key + payload
+        if len(data) > self.max_entry_bytes:
+            if overwrite:
+                # Leaving the old entry would keep serving the value this set replaced
+                self._remove(self._path(key))
+            return False
+
+        path = self._path(key)
+        try:
+            try:
+                # Linking fails if the entry exists, which makes add() atomic across processes
+                with atomic_write(path, 'wb', overwrite=overwrite) as f:
+                    f.write(data)
+            except FileExistsError:
+                if self._read(key, touch=False) is not None:
+                    return False
+                with atomic_write(path, 'wb') as f:
+                    f.write(data)
+        except OSError as e:
+            print(f"Error writing cache entry {path}: {e}")
+            return False
+
+        with self._lock:
+            self._written += len(data)
+            # Writes from other processes are only seen when the directory is measured,
+            # so it is measured again after every tenth or so of the limit written here
+            should_prune = (self._size_estimate + self._written > self.max_bytes
+                            or self._written > self.max_bytes * (1 - self.low_water))
+        if should_prune:
+            self._prune()
+        return True
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            print(f"Error removing cache entry {path}: {e}")
+            return False
+
+    def _entries(self):
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.startswith('.') and not entry.name.endswith('.tmp'):
+                yield entry
+
+    def _measure(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _prune(self):
+        """Delete the least recently used entries until the cache is under its low water mark"""
+        with file_lock(os.path.join(self.cache_dir, LOCK_FILENAME), blocking=False) as locked:
+            if not locked:
+                # Another process is already pruning
+                return
+
+            entries = []
+            total = 0
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            target = self.max_bytes * self.low_water
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= target:
+                        break
+                    if self._remove(path):
+                        total -= size
+
+            with self._lock:
+                self._size_estimate = total
+                self._written = 0
+
+    def get(self, key: str) -> Any:
+        entry = self._read(key)
+        return entry[0] if entry is not None else None
+
+    def has(self, key: str) -> bool:
+        return self._read(key, touch=False) is not None
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        return self._write(key, value, timeout, overwrite=True)
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        return self._write(key, value, timeout, overwrite=False)
+
+    def delete(self, key: str) -> bool:
+        return self._remove(self._path(key))
+
+    def clear(self) -> bool:
+        for entry in list(self._entries()):
+            self._remove(entry.path)
+        with self._lock:
+            self._size_estimate = 0
+            self._written = 0
+        return True
\ No newline at end of file
@@ -0,0 +1,104 @@
+import heapq
+from typing import Callable, Dict, Hashable, Iterable, List, Set, Tuple
+
+# Only the terms sharing the most trigrams are checked by edit distance
+MAX_CANDIDATES = 50
+
+def trigrams(term: str) -> Set[str]:
+    """Get the padded character trigrams of a term"""
+    padded = f'  {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def inner_trigrams(fragment: str) -> Set[str]:
+    """Get the unpadded trigrams of a fragment, which every term containing it shares"""
+    return {fragment[i:i + 3] for i in range(len(fragment) - 2)}
+
+def levenshtein(a: str, b: str, max_distance: int) -> int:
+    """Edit distance between two strings, or max_distance + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ch_a in enumerate(a, 1):
+        current = [i]
+        for j, ch_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ch_a != ch_b)
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+def max_distance(term: str) -> int:
+    """Number of typos tolerated for a term of this length"""
+    if len(term) <= 4:
+        return 1
+    return 2 if len(term) <= 8 else 3
+
+def find_similar(term: str, terms_with: Callable[[str], Iterable[Hashable]], term_of: Callable[[Hashable], str],
+                 limit: int = 5) -> List[Tuple[int, str]]:
+    """Find terms close to term, as (edit distance, term) pairs.
+
+    terms_with(trigram) gives the terms containing a trigram, or keys
+    standing for them that term_of turns into terms. Only the candidates
+    sharing the most trigrams with term are resolved and compared, so
+    the work done depends on those trigrams rather than the vocabulary.
+    """
+    query_trigrams = trigrams(term)
+    shared: Dict[Hashable, int] = {}
+    for trigram in query_trigrams:
+        for candidate in terms_with(trigram):
+            shared[candidate] = shared.get(candidate, 0) + 1
+
+    # Each edit changes at most three trigrams
+    tolerated = max_distance(term)
+    min_shared = len(query_trigrams) - 3 * tolerated
+    candidates = heapq.nlargest(MAX_CANDIDATES, shared.items(), key=lambda item: item[1])
+    matches = []
+    for candidate, count in candidates:
+        if count < min_shared:
+            continue
+        candidate = term_of(candidate)
+        if candidate == term:
+            continue
+        distance = levenshtein(term, candidate, tolerated)
+        if distance <= tolerated:
+            matches.append((distance, candidate))
+    return sorted(matches)[:limit]
+
+class TrigramIndex:
+    """Index from character trigrams to the terms that contain them"""
+
+    def __init__(self):
+        self._terms: Dict[str, Set[str]] = {}
+
+    def add(self, term: str):
+        """Add a term to the index"""
+        for trigram in trigrams(term):
+            self._terms.setdefault(trigram, set()).add(term)
+
+    def remove(self, term: str):
+        """Remove a term from the index"""
+        for trigram in trigrams(term):
+            terms = self._terms.get(trigram)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._terms[trigram]
+
+    def similar(self, term: str, limit: int = 5) -> List[Tuple[int, str]]:
+        """Find indexed terms close to term, as (edit distance, term) pairs"""
+        return find_similar(term, lambda trigram: self._terms.get(trigram, ()), lambda candidate: candidate, limit)
+
+    def containing(self, fragment: str, limit: int) -> List[str]:
+        """Get up to limit + 1 indexed terms containing a fragment of three or more characters"""
+        candidates = None
+        for trigram in sorted(inner_trigrams(fragment), key=lambda trigram: len(self._terms.get(trigram, ()))):
+            terms = self._terms.get(trigram, set())
+            candidates = set(terms) if candidates is None else candidates & terms
+            if not candidates:
+                return []
+        return [term for term in candidates if fragment in term][:limit + 1] if candidates else []
\ No newline at end of file
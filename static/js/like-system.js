@@ -72,51 +72,33 @@ function updateLikeUI(button, likeCount, isLiked) {
     }
     
     // Update the like count display
-    const countElements = document.querySelectorAll(`[data-course-id="${button.dataset.courseId}"] .like-count`);
+    const countElements = document.querySelectorAll(`.like-count[data-course-id="${button.dataset.courseId}"]`);
     countElements.forEach(el => {
         el.textContent = likeCount;
     });
 }
 
 function loadLikeCounts() {
-    // Find all elements that need like counts
-    const courseElements = document.querySelectorAll('[data-course-id]');
-    if (courseElements.length === 0) {
+    // Counts rendered by the server are already filled in; only empty ones need loading
+    const countElements = document.querySelectorAll('.like-count[data-course-id]:empty');
+    if (countElements.length === 0) {
         return;
     }
     
-    const courseIds = Array.from(courseElements).map(el => el.dataset.courseId);
-    
     // Get unique course IDs
-    const uniqueCourseIds = [...new Set(courseIds)];
+    const uniqueCourseIds = [...new Set(Array.from(countElements).map(el => el.dataset.courseId))];
     
-    // Load like counts for each course
-    uniqueCourseIds.forEach(courseId => {
-        fetch(`/api/courses/${courseId}/likes`)
-        .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                // Update all elements for this course
-                const countElements = document.querySelectorAll(`[data-course-id="${courseId}"] .like-count`);
-                countElements.forEach(el => {
-                    el.textContent = data.likes;
-                });
-                
-                // Update button states based on like counts
-                const buttons = document.querySelectorAll(`[data-course-id="${courseId}"] .like-btn`);
-                buttons.forEach(button => {
-                    if (data.likes > 0) {
-                        button.classList.add('liked');
-                        button.innerHTML = `<i class="bi bi-heart-fill me-1"></i>Unlike`;
-                    } else {
-                        button.classList.remove('liked');
-                        button.innerHTML = `<i class="bi bi-heart me-1"></i>Like`;
-                    }
-                });
-            }
-        })
-        .catch(error => {
-            console.error('Error loading like count for course ' + courseId + ':', error);
-        });
+    // Load like counts for all of them in one request
+    fetch(`/api/likes?ids=${uniqueCourseIds.map(encodeURIComponent).join(',')}`)
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            countElements.forEach(el => {
+                el.textContent = data.likes[el.dataset.courseId] || 0;
+            });
+        }
+    })
+    .catch(error => {
+        console.error('Error loading like counts:', error);
     });
 }
\ No newline at end of file
@@ -0,0 +1,97 @@
+// Search-as-you-type suggestions for the navbar search box
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.nav-search .search-input').forEach(input => {
+        initSearchSuggest(input);
+    });
+});
+
+function initSearchSuggest(input) {
+    const list = document.createElement('ul');
+    list.className = 'search-suggest-list list-unstyled';
+    list.setAttribute('role', 'listbox');
+    list.hidden = true;
+    input.parentElement.appendChild(list);
+    
+    let timer = null;
+    let activeIndex = -1;
+    let lastPrefix = '';
+    
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        timer = setTimeout(() => loadSuggestions(input.value.trim()), 120);
+    });
+    
+    input.addEventListener('keydown', function(e) {
+        const items = list.querySelectorAll('a');
+        if (list.hidden || items.length === 0) {
+            return;
+        }
+        if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+            e.preventDefault();
+            activeIndex = (activeIndex + (e.key === 'ArrowDown' ? 1 : -1) + items.length) % items.length;
+            items.forEach((item, i) => item.classList.toggle('active', i === activeIndex));
+        } else if (e.key === 'Enter' && activeIndex >= 0) {
+            e.preventDefault();
+            window.location.href = items[activeIndex].href;
+        } else if (e.key === 'Escape') {
+            hideSuggestions();
+        }
+    });
+    
+    input.addEventListener('blur', function() {
+        // Delay so that clicks on a suggestion still register
+        setTimeout(hideSuggestions, 150);
+    });
+    
+    function hideSuggestions() {
+        list.hidden = true;
+        activeIndex = -1;
+    }
+    
+    function loadSuggestions(prefix) {
+        lastPrefix = prefix;
+        if (prefix.length < 2) {
+            hideSuggestions();
+            return;
+        }
+        
+        fetch(`/api/search/suggest?prefix=${encodeURIComponent(prefix)}`)
+        .then(response => response.json())
+        .then(data => {
+            // Ignore responses that arrive after the user kept typing
+            if (!data.success || prefix !== lastPrefix) {
+                return;
+            }
+            renderSuggestions(data.suggestions);
+        })
+        .catch(error => {
+            console.error('Error loading search suggestions:', error);
+        });
+    }
+    
+    function renderSuggestions(suggestions) {
+        list.innerHTML = '';
+        activeIndex = -1;
+        if (suggestions.length === 0) {
+            hideSuggestions();
+            return;
+        }
+        
+        const icons = {course: 'bi-collection', document: 'bi-file-earmark-text', section: 'bi-hash'};
+        suggestions.forEach(suggestion => {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            link.href = suggestion.url;
+            link.setAttribute('role', 'option');
+            
+            const icon = document.createElement('i');
+            icon.className = `bi ${icons[suggestion.type] || 'bi-search'} me-2`;
+            link.appendChild(icon);
+            link.appendChild(document.createTextNode(suggestion.label));
+            
+            item.appendChild(link);
+            list.appendChild(item);
+        });
+        list.hidden = false;
+    }
+}
@@ -0,0 +1,88 @@
+"""Concurrency tests for the like count stores shared by worker processes.
+
+Run from the repository root:
+
+    python -m pytest tests
+
+Several processes, each with several threads, change the same counters
+at once, on top of counts migrated from a likes.json written before the
+stores existed, and every change must be counted exactly once.
+"""
+import json
+import multiprocessing
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.like_journal import LikeJournal
+from src.utils.like_store import SQLiteLikeStore
+
+PROCESSES = 4
+THREADS = 4
+ROUNDS = 100
+LEGACY_LIKES = {'migrated': 1000, 'floored': 20, 'untouched': 7}
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='stores rely on flock across processes')
+
+def open_store(backend: str, data_folder: Path):
+    """Open the store a worker process would use"""
+    if backend == 'sqlite':
+        return SQLiteLikeStore(data_folder / 'likes.db', legacy_path=data_folder / 'likes.json')
+    # Tiny limits make compaction race with appends from the other processes
+    return LikeJournal(data_folder / 'likes.json', fsync_interval=0.01, sync_interval=0, compact_bytes=2048)
+
+def add_likes(backend: str, data_folder: str, start):
+    """Worker process: change the counters from several threads sharing one store"""
+    store = open_store(backend, Path(data_folder))
+    start.wait()
+
+    def run():
+        for _ in range(ROUNDS):
+            store.add('migrated', 1)
+            store.add('new', 1)
+            store.add('floored', -1)
+
+    threads = [threading.Thread(target=run) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.flush()
+
+@pytest.mark.parametrize('backend', ['journal', 'sqlite'])
+def test_concurrent_adds_are_all_counted(tmp_path, backend):
+    (tmp_path / 'likes.json').write_text(json.dumps(LEGACY_LIKES), encoding='utf-8')
+
+    context = multiprocessing.get_context('spawn')
+    start = context.Event()
+    processes = [context.Process(target=add_likes, args=(backend, str(tmp_path), start))
+                 for _ in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    start.set()
+    for process in processes:
+        process.join(120)
+        assert process.exitcode == 0
+
+    adds = PROCESSES * THREADS * ROUNDS
+    assert open_store(backend, tmp_path).counts() == {
+        'migrated': LEGACY_LIKES['migrated'] + adds,
+        'new': adds,
+        'floored': 0,
+        'untouched': LEGACY_LIKES['untouched']
+    }
+
+def test_journal_replays_into_sqlite_migration(tmp_path):
+    """Deltas still in the journal are migrated along with the snapshot"""
+    journal = LikeJournal(tmp_path / 'likes.json')
+    journal.add('course', 3)
+    journal.add('course', -1)
+
+    store = SQLiteLikeStore(tmp_path / 'likes.db', legacy_path=tmp_path / 'likes.json')
+    assert store.get('course') == 2
+    assert store.add('course', 1) == 3
\ No newline at end of file